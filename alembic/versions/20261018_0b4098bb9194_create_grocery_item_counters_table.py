@@ -0,0 +1,43 @@
+"""create grocery_item_counters table
+
+Revision ID: 0b4098bb9194
+Revises: 752a29069411
+Create Date: 2026-10-18 15:32:18.640077
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b4098bb9194'
+down_revision: Union[str, None] = '752a29069411'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Reuse the grocerystatus enum created with grocery_items
+    status_type = sa.Enum('pending', 'purchased', name='grocerystatus').with_variant(
+        postgresql.ENUM('pending', 'purchased', name='grocerystatus', create_type=False), 'postgresql'
+    )
+    op.create_table('grocery_item_counters',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('status', status_type, nullable=False),
+    sa.Column('item_count', sa.Integer(), nullable=False),
+    sa.Column('total_quantity', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('owner_id', 'status')
+    )
+    # Backfill from the existing items
+    op.execute(
+        'INSERT INTO grocery_item_counters (owner_id, status, item_count, total_quantity) '
+        'SELECT owner_id, status, COUNT(*), SUM(quantity) FROM grocery_items GROUP BY owner_id, status'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('grocery_item_counters')
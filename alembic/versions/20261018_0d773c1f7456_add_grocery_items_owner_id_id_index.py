@@ -0,0 +1,27 @@
+"""add grocery_items owner_id id index
+
+Revision ID: 0d773c1f7456
+Revises: 5facfeb2696c
+Create Date: 2026-10-18 09:12:04.311527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0d773c1f7456'
+down_revision: Union[str, None] = '5facfeb2696c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Supports owner-scoped keyset pagination: WHERE owner_id = ? AND id > ? ORDER BY id
+    op.create_index('ix_grocery_items_owner_id_id', 'grocery_items', ['owner_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_grocery_items_owner_id_id', table_name='grocery_items')
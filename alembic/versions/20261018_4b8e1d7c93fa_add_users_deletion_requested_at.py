@@ -0,0 +1,30 @@
+"""add users deletion_requested_at
+
+Revision ID: 4b8e1d7c93fa
+Revises: 9c2f6e81a4d7
+Create Date: 2026-10-18 20:14:52.618204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b8e1d7c93fa'
+down_revision: Union[str, None] = '9c2f6e81a4d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # No backfill: an inactive user hasn't necessarily asked to be deleted
+    op.add_column('users', sa.Column('deletion_requested_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_users_deletion_requested_at', 'users', ['deletion_requested_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_deletion_requested_at', table_name='users')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('deletion_requested_at')
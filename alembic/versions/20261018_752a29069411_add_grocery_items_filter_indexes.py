@@ -0,0 +1,42 @@
+"""add grocery_items filter indexes
+
+Revision ID: 752a29069411
+Revises: 753be3009a62
+Create Date: 2026-10-18 14:05:51.228390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '752a29069411'
+down_revision: Union[str, None] = '753be3009a62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The standalone name index isn't owner-scoped, so list queries never use it
+    op.drop_index('ix_grocery_items_name', table_name='grocery_items')
+    op.create_index('ix_grocery_items_owner_id_status_id', 'grocery_items', ['owner_id', 'status', 'id'], unique=False)
+    op.create_index('ix_grocery_items_owner_id_created_at', 'grocery_items', ['owner_id', 'created_at'], unique=False)
+    op.create_index('ix_grocery_items_owner_id_name', 'grocery_items', ['owner_id', 'name'], unique=False)
+    if op.get_context().dialect.name == 'postgresql':
+        # Serves case-insensitive prefix and substring matches (ILIKE) on name
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index(
+            'ix_grocery_items_name_trgm', 'grocery_items', ['name'], unique=False,
+            postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+        )
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        op.drop_index('ix_grocery_items_name_trgm', table_name='grocery_items')
+    op.drop_index('ix_grocery_items_owner_id_name', table_name='grocery_items')
+    op.drop_index('ix_grocery_items_owner_id_created_at', table_name='grocery_items')
+    op.drop_index('ix_grocery_items_owner_id_status_id', table_name='grocery_items')
+    op.create_index(op.f('ix_grocery_items_name'), 'grocery_items', ['name'], unique=False)
@@ -0,0 +1,27 @@
+"""add users items_version
+
+Revision ID: 753be3009a62
+Revises: 0d773c1f7456
+Create Date: 2026-10-18 11:40:27.905114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '753be3009a62'
+down_revision: Union[str, None] = '0d773c1f7456'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('items_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('items_version')
@@ -0,0 +1,43 @@
+"""add ON DELETE CASCADE to grocery_items.owner_id
+
+Revision ID: 9c2f6e81a4d7
+Revises: e41c7a9d2b36
+Create Date: 2026-10-18 18:02:41.227365
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c2f6e81a4d7'
+down_revision: Union[str, None] = 'e41c7a9d2b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Postgres' name for the constraint created unnamed with grocery_items
+CONSTRAINT = 'grocery_items_owner_id_fkey'
+# SQLite keeps no constraint names; batch mode names the reflected FK with this convention
+SQLITE_NAMING = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def _replace_owner_fk(ondelete: Union[str, None]) -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        with op.batch_alter_table('grocery_items', naming_convention=SQLITE_NAMING) as batch_op:
+            batch_op.drop_constraint('fk_grocery_items_owner_id_users', type_='foreignkey')
+            batch_op.create_foreign_key(
+                'fk_grocery_items_owner_id_users', 'users', ['owner_id'], ['id'], ondelete=ondelete
+            )
+        return
+    op.drop_constraint(CONSTRAINT, 'grocery_items', type_='foreignkey')
+    op.create_foreign_key(CONSTRAINT, 'grocery_items', 'users', ['owner_id'], ['id'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    # Deleting a user now removes their items in the database, without the ORM loading them
+    _replace_owner_fk('CASCADE')
+
+
+def downgrade() -> None:
+    _replace_owner_fk(None)
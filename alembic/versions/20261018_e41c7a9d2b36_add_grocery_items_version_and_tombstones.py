@@ -0,0 +1,41 @@
+"""add grocery_items version and tombstones
+
+Revision ID: e41c7a9d2b36
+Revises: 0b4098bb9194
+Create Date: 2026-10-18 16:48:05.311842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41c7a9d2b36'
+down_revision: Union[str, None] = '0b4098bb9194'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows get version 0 and are only returned by a full (token-less) sync
+    op.add_column('grocery_items', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+    op.create_index('ix_grocery_items_owner_id_version', 'grocery_items', ['owner_id', 'version'], unique=False)
+    op.create_table('grocery_item_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_grocery_item_tombstones_owner_id_version', 'grocery_item_tombstones', ['owner_id', 'version'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_grocery_item_tombstones_owner_id_version', table_name='grocery_item_tombstones')
+    op.drop_table('grocery_item_tombstones')
+    op.drop_index('ix_grocery_items_owner_id_version', table_name='grocery_items')
+    with op.batch_alter_table('grocery_items') as batch_op:
+        batch_op.drop_column('version')
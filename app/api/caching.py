@@ -0,0 +1,76 @@
+import hashlib
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from app.core.config import settings
+
+# Per-user responses: browsers may keep them, shared caches may not, and every use is revalidated
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(owner_id: int, version: int, variant: str) -> str:
+    """
+    Strong ETag for an owner's data at a list version. `variant` distinguishes
+    responses built from the same version (page parameters, item id).
+    """
+    digest = hashlib.blake2b(variant.encode(), digest_size=8).hexdigest()
+    return f'"{owner_id}-{version}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+
+class CachedPage(NamedTuple):
+    body: bytes
+    headers: dict
+
+
+class PageCache:
+    """
+    LRU of serialized list pages keyed by ETag. The ETag embeds the owner's list
+    version, so a write makes old entries unreachable and they age out.
+
+    Bounded by entry count and by total body size; a single page larger than an
+    eighth of the byte budget is not cached, so one client can't flush everyone's pages.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: OrderedDict[str, CachedPage] = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, etag: str) -> Optional[CachedPage]:
+        page = self._data.get(etag)
+        if page is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(etag)
+        self.hits += 1
+        return page
+
+    def set(self, etag: str, body: bytes, headers: dict) -> None:
+        if self.max_entries <= 0 or len(body) > self.max_bytes // 8:
+            return
+        previous = self._data.pop(etag, None)
+        if previous is not None:
+            self.size_bytes -= len(previous.body)
+        self._data[etag] = CachedPage(body, headers)
+        self.size_bytes += len(body)
+        while len(self._data) > self.max_entries or self.size_bytes > self.max_bytes:
+            _, evicted = self._data.popitem(last=False)
+            self.size_bytes -= len(evicted.body)
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "bytes": self.size_bytes, "hits": self.hits, "misses": self.misses}
+
+
+page_cache = PageCache(
+    max_entries=settings.LIST_PAGE_CACHE_MAX_ENTRIES, max_bytes=settings.LIST_PAGE_CACHE_MAX_BYTES
+)
@@ -1,42 +1,94 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from jose import JWTError
 from pydantic import ValidationError
 
-from app.core.database import get_db
+from app.core.database import async_session
 from app.core import security
 from app.core.config import settings
+from app.core.user_cache import user_cache
 from app.models import models
-from app.schemas import schemas
 from app.crud import users as crud_users
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
+# For routes that also take the token from the query string
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login", auto_error=False)
+
+READ_METHODS = frozenset({"GET", "HEAD"})
+
+async def get_db(request: Request):
+    """
+    The request's session. For GET/HEAD requests, plain SELECTs may be served by a
+    read replica when DATABASE_REPLICA_URLS is set (see database.RoutingSession).
+    """
+    async with async_session() as db:
+        if request.method in READ_METHODS:
+            db.info["read_only"] = True
+        yield db
+
+async def get_user_for_subject(db: AsyncSession, subject: str, user_id: int | None = None) -> models.User | None:
+    """
+    Resolve the token subject to a User, served from user_cache when possible.
+    On a miss the primary-key lookup is used when the token carries the user id.
+    Either way the user must match both the subject and the token's user id, so a
+    token for a deleted account can't resolve to a new account with the same email.
+    """
+    cached = await user_cache.get(subject)
+    if cached is not None and cached["email"] == subject and (user_id is None or cached["id"] == user_id):
+        # Attach the cached row to this session without a SELECT so crud calls still work on it
+        user = models.User(**cached)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+    if user_id is not None:
+        user = await crud_users.get_user(db, user_id=user_id)
+        if user is not None and user.email != subject:
+            user = None
+    else:
+        user = await crud_users.get_user_by_email(db, email=subject)
+    if user is not None and user.is_active:
+        await user_cache.set(subject, user)
+    return user
 
 async def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+    db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)
 ) -> models.User:
+    return await _user_for_token(db, token)
+
+async def get_current_user_for_stream(
+    db: AsyncSession = Depends(get_db),
+    token: str | None = Depends(optional_oauth2_scheme),
+    access_token: str | None = Query(None, description="Bearer token, for clients such as EventSource that can't send headers"),
+) -> models.User:
+    """
+    Like get_current_user, but the token may also come as `?access_token=`.
+    Query strings end up in access logs, so only long-lived streams use this.
+    """
+    token = token or access_token
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await _user_for_token(db, token)
+
+async def _user_for_token(db: AsyncSession, token: str) -> models.User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        print(payload)
-        email: str | None = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        email = email[9:(len(email)-2)]
-        print(email)
-        token_data = schemas.TokenData(email=email)
-        print(token_data)
+        token_data = security.decode_access_token(token)
     except (JWTError, ValidationError):
         raise credentials_exception
 
-    user = crud_users.get_user_by_email(db, email=token_data.email)
+    # Lets replica routing keep this user's reads on the primary right after their writes
+    db.info["user_id"] = token_data.uid
+    user = await get_user_for_subject(db, token_data.email, user_id=token_data.uid)
     if user is None:
         raise credentials_exception
     if not user.is_active:
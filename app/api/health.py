@@ -0,0 +1,35 @@
+import logging
+
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.database import check_database
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/healthz", include_in_schema=False)
+async def healthz():
+    """
+    Liveness: the worker is up and its event loop is responsive. Doesn't touch the database.
+    """
+    return {"status": "ok"}
+
+
+@router.get("/readyz", include_in_schema=False)
+async def readyz():
+    """
+    Readiness: a pooled database connection can be checked out and used.
+    503 while the database is unreachable or this worker's pool is exhausted.
+
+    Unauthenticated, so it only says ready or not; the reason is logged, and pool
+    figures are in the metrics.
+    """
+    problem = await check_database(settings.READINESS_TIMEOUT_SECONDS)
+    if problem is not None:
+        logger.warning("Not ready: %s", problem)
+        return JSONResponse({"status": "unavailable"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return {"status": "ready"}
@@ -0,0 +1,34 @@
+import base64
+import json
+from typing import Literal, NamedTuple
+
+from fastapi import HTTPException, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREV_CURSOR_HEADER = "X-Prev-Cursor"
+# Largest value a client-supplied id or version can bind to without overflowing BIGINT
+BIGINT_MAX = 2**63 - 1
+
+
+class Cursor(NamedTuple):
+    id: int
+    direction: Literal["next", "prev"]
+
+
+def encode_cursor(item_id: int, direction: Literal["next", "prev"]) -> str:
+    raw = json.dumps({"id": item_id, "d": direction}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    # Cursors come back from clients: anything but an id we could have issued is a 400,
+    # never a value the database rejects
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        item_id, direction = data["id"], data["d"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if type(item_id) is not int or not 0 <= item_id <= BIGINT_MAX or direction not in ("next", "prev"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return Cursor(item_id, direction)
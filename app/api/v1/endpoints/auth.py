@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.crud import users as crud_users
 from app.core import security
 from app.core.config import settings
+from app.core.database import pin_to_primary
 from app.api import deps
 from app.schemas import schemas
 from app.models import models
@@ -13,12 +14,12 @@ router = APIRouter()
 
 @router.post("/login", response_model=schemas.Token)
 async def login_for_access_token(
-    db: Session = Depends(deps.get_db), form_data: OAuth2PasswordRequestForm = Depends()
+    db: AsyncSession = Depends(deps.get_db), form_data: OAuth2PasswordRequestForm = Depends()
 ):
     """
     OAuth2 compatible token login, get an access token for future requests.
     """
-    user = security.authenticate_user(db, form_data.username, form_data.password)
+    user = await security.authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, 
@@ -28,27 +29,31 @@ async def login_for_access_token(
     if not user.is_active:
          raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
 
+    # The account may have been created moments ago (possibly via another worker)
+    pin_to_primary(user.id)
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
-        {"sub": user.email}, expires_delta=access_token_expires
+        user.email, expires_delta=access_token_expires, uid=user.id
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.post("/register", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
 async def register_user(
-    user_in: schemas.UserCreate, db: Session = Depends(deps.get_db)
+    user_in: schemas.UserCreate, db: AsyncSession = Depends(deps.get_db)
 ):
     """
     Create new user.
     """
-    user = crud_users.get_user_by_email(db, email=user_in.email)
+    user = await crud_users.get_user_by_email(db, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="The user with this email already exists in the system.",
         )
-    user = crud_users.create_user(db=db, user=user_in)
+    user = await crud_users.create_user(db=db, user=user_in)
+    # Read-your-writes: replicas may not have the new row when the client logs in and starts reading
+    pin_to_primary(user.id)
     return user
 
 # Optional: Endpoint to test authentication
@@ -1,55 +1,494 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+import asyncio
+import codecs
+import csv
+import io
+import json
+from datetime import datetime
 
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, List, Literal, Optional
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.core.events import ChangeEvent, change_feed
 from app.schemas import schemas
 from app.models import models
 from app.crud import grocery_items as crud_items
+from app.crud import grocery_summaries as crud_summaries
 from app.api import deps
+from app.api.caching import CACHE_CONTROL, etag_matches, make_etag, page_cache
+from app.api.pagination import BIGINT_MAX, NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.api.serialization import dump_rows
 
 router = APIRouter()
 
 
+def warm_up_serializers() -> None:
+    """
+    Push a sample item through the item response model once (startup warm-up).
+    """
+    sample = models.GroceryItem(
+        id=0, name="warm-up", quantity=1, status=models.GroceryStatus.pending, owner_id=0, created_at=datetime.now()
+    )
+    schemas.GroceryItem.model_validate(sample).model_dump(mode="json")
+
+
 @router.post("/", response_model=schemas.GroceryItem, status_code=status.HTTP_201_CREATED)
 async def create_grocery_item(
     item_in: schemas.GroceryItemCreate,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ):
     """
     Create a new grocery item for the current user.
     """
-    return crud_items.create_grocery_item(db=db, item=item_in, owner_id=current_user.id)
+    return await crud_items.create_grocery_item(db=db, item=item_in, owner_id=current_user.id)
+
+
+@router.post("/bulk", response_model=schemas.GroceryItemBulkResponse)
+async def bulk_grocery_items(
+    bulk_in: schemas.GroceryItemBulkRequest,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+):
+    """
+    Create, update and delete many grocery items of the current user in one transaction.
+
+    Results are reported per operation, in request order: creates, then updates, then deletes.
+    Updates and deletes of items that don't exist or aren't owned by the user report 404.
+    """
+    total = len(bulk_in.create) + len(bulk_in.update) + len(bulk_in.delete)
+    if total > settings.BULK_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many operations: {total} (max {settings.BULK_MAX_OPERATIONS})",
+        )
+
+    created, updated, deleted = await crud_items.bulk_apply_grocery_items(
+        db,
+        owner_id=current_user.id,
+        creates=bulk_in.create,
+        updates=bulk_in.update,
+        deletes=bulk_in.delete,
+    )
+
+    results = [
+        schemas.GroceryItemBulkResult(
+            op="create", id=item.id, status=status.HTTP_201_CREATED, item=schemas.GroceryItem.model_validate(item)
+        )
+        for item in created
+    ]
+    for item_in in bulk_in.update:
+        item = updated.get(item_in.id)
+        if item is None:
+            results.append(schemas.GroceryItemBulkResult(
+                op="update", id=item_in.id, status=status.HTTP_404_NOT_FOUND, detail="Grocery item not found"
+            ))
+        else:
+            results.append(schemas.GroceryItemBulkResult(
+                op="update", id=item.id, status=status.HTTP_200_OK, item=schemas.GroceryItem.model_validate(item)
+            ))
+    deleted_ids = set(deleted)
+    for item_id in bulk_in.delete:
+        if item_id in deleted_ids:
+            results.append(schemas.GroceryItemBulkResult(op="delete", id=item_id, status=status.HTTP_204_NO_CONTENT))
+        else:
+            results.append(schemas.GroceryItemBulkResult(
+                op="delete", id=item_id, status=status.HTTP_404_NOT_FOUND, detail="Grocery item not found"
+            ))
+    return {"results": results}
 
 
 @router.get("/", response_model=List[schemas.GroceryItem])
 async def read_grocery_items(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(deps.get_db),
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=settings.LIST_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    status_filter: Optional[schemas.GroceryStatus] = Query(None, alias="status"),
+    name_prefix: Optional[str] = None,
+    q: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    sort: schemas.GroceryItemSort = "id",
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ):
     """
     Retrieve grocery items for the current user.
+
+    Filter with `status`, `name_prefix`, `q` (name substring; both case-insensitive) and
+    `created_after` / `created_before`, and order with `sort` (prefix `-` for descending).
+
+    Pages can be walked with `skip`/`limit`, or by passing the opaque cursor from the
+    `X-Next-Cursor` / `X-Prev-Cursor` response headers as `cursor` (`skip` is then ignored).
+    Cursor pages don't get slower the deeper you go; they are only available with `sort=id`.
+
+    Responses carry an ETag tied to the list version; send it back in `If-None-Match`
+    to get a 304 while nothing has changed.
+    """
+    version = await crud_items.get_list_version(db, owner_id=current_user.id)
+    # Keyed on the parsed parameters, not the raw query: unknown or reordered
+    # parameters must not mint new ETags (and page cache entries) for the same page
+    page_key = json.dumps([
+        skip, limit, cursor, status_filter, name_prefix, q,
+        created_after.isoformat() if created_after else None,
+        created_before.isoformat() if created_before else None,
+        sort,
+    ])
+    etag = make_etag(current_user.id, version, f"list:{page_key}")
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    cached = page_cache.get(etag)
+    if cached is not None:
+        return Response(content=cached.body, media_type="application/json", headers=cached.headers)
+
+    filters = schemas.GroceryItemFilter(
+        status=status_filter,
+        name_prefix=name_prefix,
+        q=q,
+        created_after=created_after,
+        created_before=created_before,
+    )
+    if cursor is None:
+        items = await crud_items.get_grocery_items_by_owner(
+            db, owner_id=current_user.id, skip=skip, limit=limit, filters=filters, sort=sort
+        )
+        # Cursors follow id order, so other sorts only get offset paging
+        has_next = sort == "id" and len(items) == limit
+        has_prev = sort == "id" and skip > 0
+    else:
+        if sort != "id":
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor paging requires sort=id")
+        position = decode_cursor(cursor)
+        if position.direction == "next":
+            items, has_next = await crud_items.get_grocery_items_by_owner_keyset(
+                db, owner_id=current_user.id, after_id=position.id, limit=limit, filters=filters
+            )
+            has_prev = True
+        else:
+            items, has_prev = await crud_items.get_grocery_items_by_owner_keyset(
+                db, owner_id=current_user.id, before_id=position.id, limit=limit, filters=filters
+            )
+            has_next = True
+
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if items and has_next:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(items[-1].id, "next")
+    if items and has_prev:
+        headers[PREV_CURSOR_HEADER] = encode_cursor(items[0].id, "prev")
+    # Rows come straight from the database in the schema's shape; encode them without re-validating
+    body = dump_rows(items)
+    page_cache.set(etag, body, headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/summary", response_model=schemas.GroceryItemSummary)
+async def read_grocery_summary(
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+):
+    """
+    Item counts and total quantity per status for the current user.
+    Served from precomputed counters, so the cost doesn't depend on list size.
+    """
+    summary = await crud_summaries.get_summary(db, owner_id=current_user.id)
+    per_status = {
+        status_value.value: schemas.GroceryStatusSummary(count=count, total_quantity=quantity)
+        for status_value, (count, quantity) in summary.items()
+    }
+    return schemas.GroceryItemSummary(
+        **per_status,
+        total_count=sum(count for count, _ in summary.values()),
+        total_quantity=sum(quantity for _, quantity in summary.values()),
+    )
+
+
+@router.get("/changes", response_model=schemas.GroceryItemChanges)
+async def read_grocery_item_changes(
+    since: Optional[str] = Query(None, description="Token from the previous sync; omit for a full sync"),
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+):
+    """
+    Delta sync for offline clients: items created or updated since `since`, and the
+    ids of items deleted since then. Keep the returned `token` for the next call.
+    """
+    since_version = None
+    if since is not None:
+        try:
+            since_version = int(since)
+        except ValueError:
+            since_version = -1
+        if not 0 <= since_version <= BIGINT_MAX:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sync token")
+
+    items, deleted, version = await crud_items.get_grocery_item_changes(
+        db, owner_id=current_user.id, since=since_version
+    )
+    if since_version is not None and since_version > version:
+        # Not a token this server issued for the current list; start over
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Sync token is no longer valid; sync without `since`")
+    return schemas.GroceryItemChanges(
+        items=[schemas.GroceryItem.model_validate(item) for item in items],
+        deleted=deleted,
+        token=str(version),
+        full=since_version is None,
+    )
+
+
+def _sse(event: ChangeEvent) -> str:
+    return f"id: {event.id}\nevent: {event.type}\ndata: {json.dumps(event.data)}\n\n"
+
+
+@router.get("/events")
+async def stream_grocery_events(
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    current_user: models.User = Depends(deps.get_current_user_for_stream),
+):
+    """
+    Server-Sent Events stream of the current user's grocery changes.
+
+    Events are `created` / `updated` (data: the item), `deleted` (data: `{"id": ...}`) and
+    `imported` (data: `{"count": ...}`, refetch the list). Reconnect with `Last-Event-ID` to
+    resume; if the gap is no longer buffered a `reset` event asks the client to refetch.
+    A client that falls too far behind gets an `overflow` event and the stream ends.
+
+    Browser `EventSource` can't send an Authorization header; it can pass the token
+    as `?access_token=` instead (the header wins when both are given).
     """
-    items = crud_items.get_grocery_items_by_owner(db, owner_id=current_user.id, skip=skip, limit=limit)
-    return items
+    subscription = await change_feed.subscribe(current_user.id, last_event_id)
+
+    async def body() -> AsyncIterator[str]:
+        try:
+            if subscription.reset:
+                yield "event: reset\ndata: {}\n\n"
+            for event in subscription.replay:
+                yield _sse(event)
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=settings.CHANGE_FEED_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    yield "event: overflow\ndata: {}\n\n"
+                    break
+                yield _sse(event)
+        finally:
+            change_feed.unsubscribe(subscription)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _export_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def _export_rows(owner_id: int, export_format: str) -> AsyncIterator[str]:
+    # The request's session is closed before a streaming body is sent, so the export opens its own
+    async with async_session() as db:
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(crud_items.EXPORT_COLUMNS)
+            yield buffer.getvalue()
+        async for rows in crud_items.stream_grocery_items_by_owner(db, owner_id, chunk_size=settings.EXPORT_CHUNK_SIZE):
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows([_export_value(value) for value in row] for row in rows)
+                yield buffer.getvalue()
+            else:
+                yield "".join(
+                    json.dumps(dict(zip(crud_items.EXPORT_COLUMNS, map(_export_value, row)))) + "\n"
+                    for row in rows
+                )
+
+
+@router.get("/export")
+async def export_grocery_items(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    current_user: models.User = Depends(deps.get_current_active_user),
+):
+    """
+    Stream every grocery item of the current user as NDJSON or CSV.
+
+    Rows are read from a server-side cursor in chunks, so memory use doesn't grow
+    with the size of the history.
+    """
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    filename = f"groceries.{'csv' if export_format == 'csv' else 'ndjson'}"
+    return StreamingResponse(
+        _export_rows(current_user.id, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+class _UnreadableBody(ValueError):
+    """The rest of an import body can't be split into lines."""
+
+
+async def _iter_lines(request: Request) -> AsyncIterator[str]:
+    # Decode the upload incrementally and hand out complete lines as they arrive.
+    # The unfinished line is kept as a list of pieces so a long line isn't re-copied per chunk.
+    max_length = settings.IMPORT_MAX_LINE_LENGTH
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending: List[str] = []
+    pending_length = 0
+
+    def decode(chunk: bytes, final: bool = False) -> str:
+        try:
+            return decoder.decode(chunk, final)
+        except UnicodeDecodeError as exc:
+            raise _UnreadableBody("Body is not valid UTF-8") from exc
+
+    async for chunk in request.stream():
+        first, *rest = decode(chunk).split("\n")
+        pending.append(first)
+        pending_length += len(first)
+        if pending_length > max_length:
+            raise _UnreadableBody(f"Line is longer than {max_length} characters")
+        if not rest:
+            continue
+        *lines, last = rest
+        for line in ["".join(pending), *lines]:
+            if len(line) > max_length:
+                raise _UnreadableBody(f"Line is longer than {max_length} characters")
+            yield line.rstrip("\r")
+        pending, pending_length = [last], len(last)
+    tail = "".join(pending) + decode(b"", final=True)
+    if len(tail) > max_length:
+        raise _UnreadableBody(f"Line is longer than {max_length} characters")
+    if tail:
+        yield tail.rstrip("\r")
+
+
+async def _iter_import_rows(request: Request, import_format: str) -> AsyncIterator[tuple[int, dict | Exception]]:
+    """
+    Yield (line number, raw row) pairs, or (line number, error) for lines that don't parse.
+    An _UnreadableBody error is the last thing yielded: nothing after that line is read.
+    CSV needs a header naming name, quantity and optionally status; quoted newlines aren't supported.
+    """
+    header = None
+    line_number = 0
+    lines = _iter_lines(request)
+    while True:
+        try:
+            line = await anext(lines)
+        except StopAsyncIteration:
+            return
+        except _UnreadableBody as exc:
+            yield line_number + 1, exc
+            return
+        line_number += 1
+        if not line.strip():
+            continue
+        if import_format == "ndjson":
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield line_number, exc
+                continue
+            yield line_number, row if isinstance(row, dict) else ValueError("Expected a JSON object")
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [value.strip() for value in values]
+            continue
+        yield line_number, {key: value for key, value in zip(header, values) if value != ""}
+
+
+@router.post("/import", response_model=schemas.GroceryItemImportResult)
+async def import_grocery_items(
+    request: Request,
+    import_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+):
+    """
+    Import grocery items from an NDJSON or CSV request body.
+
+    The body is parsed as it streams in. Rows are validated one by one and inserted in
+    chunks of IMPORT_CHUNK_SIZE, using COPY on Postgres. Invalid rows are skipped and
+    reported by line number; valid rows are kept even when others fail. A body that
+    stops being readable (bad UTF-8, a line over IMPORT_MAX_LINE_LENGTH) ends the import
+    there: the rows before it are kept and `aborted` says where and why.
+    """
+    imported = failed = 0
+    errors: List[schemas.GroceryItemImportError] = []
+    aborted = None
+    chunk: List[schemas.GroceryItemCreate] = []
+
+    async for line_number, row in _iter_import_rows(request, import_format):
+        error = None
+        if isinstance(row, _UnreadableBody):
+            aborted = schemas.GroceryItemImportError(line=line_number, error=str(row))
+            break
+        if isinstance(row, Exception):
+            error = str(row)
+        else:
+            try:
+                chunk.append(schemas.GroceryItemCreate.model_validate(row))
+            except ValidationError as exc:
+                error = str(exc)
+        if error is not None:
+            failed += 1
+            if len(errors) < settings.IMPORT_MAX_REPORTED_ERRORS:
+                errors.append(schemas.GroceryItemImportError(line=line_number, error=error))
+            continue
+        if len(chunk) >= settings.IMPORT_CHUNK_SIZE:
+            imported += await crud_items.import_grocery_items(db, owner_id=current_user.id, items=chunk)
+            chunk = []
+    imported += await crud_items.import_grocery_items(db, owner_id=current_user.id, items=chunk)
+
+    return schemas.GroceryItemImportResult(
+        imported=imported, failed=failed, errors=errors, errors_truncated=failed > len(errors), aborted=aborted
+    )
+
+
+async def _item_lookup_error(db: AsyncSession, item_id: int, action: str) -> HTTPException:
+    """
+    Build the error for an item the owner-scoped query didn't match.
+    Only runs on the miss path, to tell a missing item (404) from someone else's (403).
+    """
+    if not await crud_items.grocery_item_exists(db, item_id=item_id):
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Grocery item not found")
+    return HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Not authorized to {action} this item")
 
 
 @router.get("/{item_id}", response_model=schemas.GroceryItem)
 async def read_grocery_item(
     item_id: int,
-    db: Session = Depends(deps.get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ):
     """
-    Retrieve a specific grocery item by ID.
+    Retrieve a specific grocery item by ID. Supports `If-None-Match` like the list endpoint.
     """
-    db_item = crud_items.get_grocery_item(db, item_id=item_id)
+    version = await crud_items.get_list_version(db, owner_id=current_user.id)
+    etag = make_etag(current_user.id, version, f"item:{item_id}")
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+    db_item = await crud_items.get_grocery_item_for_owner(db, item_id=item_id, owner_id=current_user.id)
     if db_item is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Grocery item not found")
-    if db_item.owner_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this item")
+        raise await _item_lookup_error(db, item_id, "access")
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
     return db_item
 
 
@@ -57,37 +496,31 @@ async def read_grocery_item(
 async def update_grocery_item(
     item_id: int,
     item_in: schemas.GroceryItemUpdate,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ):
     """
     Update a specific grocery item by ID.
     """
-    db_item = crud_items.get_grocery_item(db, item_id=item_id)
-    if db_item is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Grocery item not found")
-    if db_item.owner_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to update this item")
-
-    updated_item = crud_items.update_grocery_item(db=db, db_item=db_item, item_update=item_in)
+    updated_item = await crud_items.update_grocery_item(
+        db=db, item_id=item_id, owner_id=current_user.id, item_update=item_in
+    )
+    if updated_item is None:
+        raise await _item_lookup_error(db, item_id, "update")
     return updated_item
 
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_grocery_item(
     item_id: int,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ):
     """
     Delete a specific grocery item by ID.
     """
-    db_item = crud_items.get_grocery_item(db, item_id=item_id)
-    if db_item is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Grocery item not found")
-    if db_item.owner_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this item")
-
-    crud_items.delete_grocery_item(db=db, db_item=db_item)
+    deleted = await crud_items.delete_grocery_item(db=db, item_id=item_id, owner_id=current_user.id)
+    if not deleted:
+        raise await _item_lookup_error(db, item_id, "delete")
     # No content to return, status code 204 handled by decorator
     return None
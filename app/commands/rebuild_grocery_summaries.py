@@ -0,0 +1,40 @@
+"""
+Check the grocery summary counters against grocery_items and fix any drift.
+
+    python -m app.commands.rebuild_grocery_summaries            # fix all owners
+    python -m app.commands.rebuild_grocery_summaries --verify   # report only, exit 1 on drift
+    python -m app.commands.rebuild_grocery_summaries --owner-id 42
+
+Counters are recounted from a snapshot, so run it when the owners involved aren't writing.
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+from app.core.database import async_session
+from app.crud import grocery_summaries
+
+
+async def run(owner_id: int | None, fix: bool) -> list[dict]:
+    async with async_session() as db:
+        return await grocery_summaries.rebuild_counters(db, owner_id=owner_id, fix=fix)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--owner-id", type=int, default=None, help="only check this owner")
+    parser.add_argument("--verify", action="store_true", help="report drift without fixing it")
+    args = parser.parse_args()
+
+    drift = asyncio.run(run(args.owner_id, fix=not args.verify))
+    for entry in drift:
+        print(json.dumps(entry))
+    action = "found" if args.verify else "fixed"
+    print(f"{len(drift)} drifted counter(s) {action}", file=sys.stderr)
+    if args.verify and drift:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
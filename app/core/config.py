@@ -10,6 +10,16 @@ def get_database_url() -> str:
         db_url = db_url.replace("postgres://", "postgresql://", 1)
     return db_url
 
+def get_async_database_url(db_url: str) -> str:
+    # Map the sync driver URL onto its asyncio driver (asyncpg / aiosqlite)
+    if db_url.startswith("postgresql://"):
+        return db_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if db_url.startswith("postgresql+psycopg2://"):
+        return db_url.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
+    if db_url.startswith("sqlite://"):
+        return db_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return db_url
+
 class Settings(BaseSettings):
     PROJECT_NAME: str = "GroceryWise API"
     API_V1_STR: str = "/api/v1"
@@ -17,14 +27,132 @@ class Settings(BaseSettings):
     # Annotate the DATABASE_URL with the correct type
     DATABASE_URL: str = get_database_url()  # Ensure this is properly typed as a string
 
+    # Connection pool for the API engine (size/overflow/timeout apply to queue pools)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Optional read replicas, comma separated. Plain SELECTs of GET/HEAD requests go to
+    # them round-robin; a user's reads stay on the primary for REPLICA_STICKY_SECONDS
+    # after they write, so they see their own changes
+    DATABASE_REPLICA_URLS: str = os.getenv("DATABASE_REPLICA_URLS", "")
+    REPLICA_STICKY_SECONDS: float = float(os.getenv("REPLICA_STICKY_SECONDS", 5))
+
+    # Connections all worker processes together may open; each worker's pool is capped
+    # at its share (DB_MAX_CONNECTIONS / WEB_CONCURRENCY). 0 disables the cap
+    DB_MAX_CONNECTIONS: int = int(os.getenv("DB_MAX_CONNECTIONS", 0))
+    # Per-connection Postgres timeouts in milliseconds; 0 leaves the server default
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+    DB_LOCK_TIMEOUT_MS: int = int(os.getenv("DB_LOCK_TIMEOUT_MS", 0))
+
+    # Multi-process serving (python -m app.serve). WEB_CONCURRENCY is the worker count;
+    # 0 uses one per available CPU (app.serve exports the resolved count to the workers).
+    # More than one needs the *_REDIS_URL backends below, or caches and feeds diverge per worker
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", 1))
+    # Seconds in-flight requests get to finish after SIGTERM before they are cancelled
+    SHUTDOWN_GRACE_SECONDS: int = int(os.getenv("SHUTDOWN_GRACE_SECONDS", 30))
+    # GET /readyz fails if a pooled connection can't be checked out and used within this time
+    READINESS_TIMEOUT_SECONDS: float = float(os.getenv("READINESS_TIMEOUT_SECONDS", 2))
+
+    # Open the pool's connections and exercise the response serializers at startup,
+    # so the first requests don't pay for them. Startup then fails if the database is down.
+    STARTUP_WARMUP: bool = os.getenv("STARTUP_WARMUP", "false").lower() == "true"
+
     # JWT settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "a_default_secret_key")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+    # Already-verified tokens remembered until expiry; 0 disables
+    TOKEN_CACHE_MAX_SIZE: int = int(os.getenv("TOKEN_CACHE_MAX_SIZE", 10000))
+
+    # Password hashing pool ("thread" or "process"); bcrypt runs off the event loop
+    PASSWORD_HASH_EXECUTOR: str = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", 4))
+    # Max hash/verify calls in flight at once; further calls queue up
+    PASSWORD_HASH_MAX_CONCURRENCY: int = int(os.getenv("PASSWORD_HASH_MAX_CONCURRENCY", 4))
+    # bcrypt cost for new hashes; hashes below it are upgraded in the background on login
+    PASSWORD_BCRYPT_ROUNDS: int = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", 12))
+
+    # Background jobs (account deletion, password rehash): worker tasks per process,
+    # queued jobs before enqueue waits, and retries with exponential backoff
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", 2))
+    JOB_QUEUE_SIZE: int = int(os.getenv("JOB_QUEUE_SIZE", 1000))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+    JOB_RETRY_BACKOFF_SECONDS: float = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", 1))
+    # Seconds queued jobs get to finish at shutdown; the rest wait in the store for the next start
+    JOB_DRAIN_SECONDS: float = float(os.getenv("JOB_DRAIN_SECONDS", 10))
+    # Optional SQLite file keeping queued jobs across restarts, e.g. /var/lib/grocerywise/jobs.db.
+    # A job held by a worker that died is picked up by the next worker start after the lease runs out
+    JOB_STORE_PATH: str | None = os.getenv("JOB_STORE_PATH")
+    JOB_LEASE_SECONDS: float = float(os.getenv("JOB_LEASE_SECONDS", 300))
+
+    # Max create + update + delete operations accepted by POST /groceries/bulk
+    BULK_MAX_OPERATIONS: int = int(os.getenv("BULK_MAX_OPERATIONS", 5000))
+
+    # Rows fetched per server-side cursor round-trip by GET /groceries/export
+    EXPORT_CHUNK_SIZE: int = int(os.getenv("EXPORT_CHUNK_SIZE", 1000))
+
+    # POST /groceries/import: rows inserted per chunk, and failed rows listed in the response
+    IMPORT_CHUNK_SIZE: int = int(os.getenv("IMPORT_CHUNK_SIZE", 1000))
+    IMPORT_MAX_REPORTED_ERRORS: int = int(os.getenv("IMPORT_MAX_REPORTED_ERRORS", 100))
+    # Longest import line in characters; a longer one stops the import
+    IMPORT_MAX_LINE_LENGTH: int = int(os.getenv("IMPORT_MAX_LINE_LENGTH", 64 * 1024))
+
+    # Serialized GET /groceries/ pages kept in process, keyed by ETag; 0 disables
+    LIST_PAGE_CACHE_MAX_ENTRIES: int = int(os.getenv("LIST_PAGE_CACHE_MAX_ENTRIES", 1000))
+    # Total size of the cached bodies; a page over an eighth of it isn't cached at all
+    LIST_PAGE_CACHE_MAX_BYTES: int = int(os.getenv("LIST_PAGE_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+    # Largest `limit` accepted by GET /groceries/
+    LIST_MAX_LIMIT: int = int(os.getenv("LIST_MAX_LIMIT", 1000))
+
+    # Grocery change feed (GET /groceries/events)
+    CHANGE_FEED_REPLAY_SIZE: int = int(os.getenv("CHANGE_FEED_REPLAY_SIZE", 256))
+    CHANGE_FEED_QUEUE_SIZE: int = int(os.getenv("CHANGE_FEED_QUEUE_SIZE", 100))
+    CHANGE_FEED_HEARTBEAT_SECONDS: float = float(os.getenv("CHANGE_FEED_HEARTBEAT_SECONDS", 15))
+    # Optional shared broker for multi-worker fan-out, e.g. redis://localhost:6379/0
+    CHANGE_FEED_REDIS_URL: str | None = os.getenv("CHANGE_FEED_REDIS_URL")
+
+    # Authenticated-user cache; a TTL of 0 disables it
+    USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", 10000))
+    # Optional shared backend for multi-worker deployments, e.g. redis://localhost:6379/0
+    USER_CACHE_REDIS_URL: str | None = os.getenv("USER_CACHE_REDIS_URL")
+
+    # Token-bucket rate limits: comma-separated "METHOD /route/template=requests/seconds[:ip|user]"
+    # ("*" matches any method; the first matching rule applies). Empty disables limiting
+    RATE_LIMITS: str = os.getenv(
+        "RATE_LIMITS",
+        "POST /api/v1/auth/login=10/60:ip,POST /api/v1/auth/register=5/60:ip,* /api/v1/groceries/=600/60:user",
+    )
+    # Buckets kept by the in-process store (least recently used are dropped first)
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+    # Optional shared store so limits hold across workers, e.g. redis://localhost:6379/0
+    RATE_LIMIT_REDIS_URL: str | None = os.getenv("RATE_LIMIT_REDIS_URL")
+    # Proxies whose X-Forwarded-For is trusted for the client IP (comma separated, "*" for any).
+    # Behind a load balancer such as Heroku's router, set "*" (or its addresses): otherwise every
+    # request appears to come from the proxy and all clients share the per-IP rate limits
+    FORWARDED_ALLOW_IPS: str = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+    # Request metrics (GET /metrics) and query logging
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    # Statements slower than this are logged with their route; 0 disables
+    METRICS_SLOW_QUERY_MS: float = float(os.getenv("METRICS_SLOW_QUERY_MS", 200))
+    # A request running one statement this many times is logged as a possible N+1; 0 disables
+    METRICS_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("METRICS_N_PLUS_ONE_THRESHOLD", 20))
 
     class Config:
         case_sensitive = True
 
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        return get_async_database_url(self.DATABASE_URL)
+
+    @property
+    def ASYNC_REPLICA_URLS(self) -> list[str]:
+        urls = [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+        return [get_async_database_url(url.replace("postgres://", "postgresql://", 1)) for url in urls]
+
 settings = Settings()
 
 
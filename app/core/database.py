@@ -1,20 +1,281 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from sqlalchemy import Select, event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .config import settings
 
 connect_args = {}
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args=connect_args,
-    future=True
-)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+class PoolWaitStats:
+    """
+    Time spent waiting for a connection from the pool, per checkout.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.total_wait += seconds
+        self.max_wait = max(self.max_wait, seconds)
+
+
+pool_wait_stats = PoolWaitStats()
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait_stats.record(time.perf_counter() - start)
+
+
+def worker_pool_limits() -> tuple[int, int]:
+    """
+    Pool size and max overflow for this process, kept within its share of DB_MAX_CONNECTIONS.
+    """
+    pool_size, max_overflow = settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    if settings.DB_MAX_CONNECTIONS:
+        share = max(settings.DB_MAX_CONNECTIONS // max(settings.WEB_CONCURRENCY, 1), 1)
+        pool_size = min(pool_size, share)
+        max_overflow = min(max_overflow, share - pool_size)
+    return pool_size, max_overflow
+
+
+def _async_engine_options(url: str, primary: bool = True) -> dict:
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    if ":memory:" not in url:
+        # In-memory SQLite needs its single static connection; everything else gets a sized queue pool
+        pool_size, max_overflow = worker_pool_limits()
+        options.update(
+            # Checkout waits are reported for the primary
+            poolclass=TimedAsyncQueuePool if primary else AsyncAdaptedQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    async_connect_args = dict(connect_args)
+    if url.startswith("postgresql+asyncpg"):
+        # Applied by asyncpg when each connection opens, so every session inherits them
+        server_settings = {}
+        if settings.DB_STATEMENT_TIMEOUT_MS:
+            server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if settings.DB_LOCK_TIMEOUT_MS:
+            server_settings["lock_timeout"] = str(settings.DB_LOCK_TIMEOUT_MS)
+        if server_settings:
+            async_connect_args["server_settings"] = server_settings
+    options["connect_args"] = async_connect_args
+    return options
+
+
+class ReplicaRouter:
+    """
+    Round-robin over the read replicas, and the users whose reads must stay on
+    the primary for a while after they wrote (read-your-writes).
+    """
+
+    def __init__(self, engines: List[AsyncEngine], sticky_seconds: float, max_users: int = 100000):
+        self.engines = engines
+        self.sticky_seconds = sticky_seconds
+        self.max_users = max_users
+        self._next = itertools.cycle(engines)
+        self._recent_writers: OrderedDict[int, float] = OrderedDict()
+
+    def next_engine(self) -> AsyncEngine:
+        return next(self._next)
+
+    def mark_write(self, user_id: Optional[int]) -> None:
+        if user_id is None or self.sticky_seconds <= 0:
+            return
+        self._recent_writers[user_id] = time.monotonic() + self.sticky_seconds
+        self._recent_writers.move_to_end(user_id)
+        while len(self._recent_writers) > self.max_users:
+            self._recent_writers.popitem(last=False)
+
+    def is_sticky(self, user_id: Optional[int]) -> bool:
+        until = self._recent_writers.get(user_id) if user_id is not None else None
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            del self._recent_writers[user_id]
+            return False
+        return True
+
+
+def _is_plain_select(clause) -> bool:
+    return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+class RoutingSession(Session):
+    """
+    Sync session behind AsyncSession when replicas are configured.
+
+    In a session marked `info["read_only"]`, plain SELECTs go to one replica
+    (picked round-robin per session) unless the user in `info["user_id"]` wrote
+    recently. Everything else (flushes, INSERT/UPDATE/DELETE, SELECT ... FOR
+    UPDATE) goes to the primary, and once a session has used the primary it
+    stays there. Committed writes mark the user sticky.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        info = self.info
+        if (
+            info.get("read_only")
+            and not info.get("primary")
+            and not self._flushing
+            and _is_plain_select(clause)
+            and not _replica_router.is_sticky(info.get("user_id"))
+        ):
+            replica = info.get("replica")
+            if replica is None:
+                replica = info["replica"] = _replica_router.next_engine()
+            return replica.sync_engine
+        if self._flushing or not _is_plain_select(clause):
+            info["wrote"] = True
+        info["primary"] = True
+        return get_async_engine().sync_engine
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _mark_writer(session: Session) -> None:
+    if session.info.pop("wrote", False):
+        _replica_router.mark_write(session.info.get("user_id"))
+
+
+# Async engine: used by the API so queries don't block the event loop.
+# Built on first use (normally the app's lifespan), so importing the app never
+# loads a driver or touches the database.
+_async_engine: Optional[AsyncEngine] = None
+_sessionmaker: Optional[async_sessionmaker] = None
+_replica_router: Optional[ReplicaRouter] = None
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record) -> None:
+    # SQLite ignores foreign keys, and so ON DELETE CASCADE, unless enabled per connection
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine, _sessionmaker, _replica_router
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            settings.ASYNC_DATABASE_URL, **_async_engine_options(settings.ASYNC_DATABASE_URL)
+        )
+        if _async_engine.dialect.name == "sqlite":
+            event.listen(_async_engine.sync_engine, "connect", _enable_sqlite_foreign_keys)
+        # expire_on_commit=False: attributes can't be lazily reloaded outside an await
+        session_options = dict(bind=_async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession)
+        replica_urls = settings.ASYNC_REPLICA_URLS
+        if replica_urls:
+            replicas = [create_async_engine(url, **_async_engine_options(url, primary=False)) for url in replica_urls]
+            _replica_router = ReplicaRouter(replicas, settings.REPLICA_STICKY_SECONDS)
+            session_options["sync_session_class"] = RoutingSession
+        _sessionmaker = async_sessionmaker(**session_options)
+    return _async_engine
+
+
+def pin_to_primary(user_id: int) -> None:
+    """
+    Keep `user_id`'s reads on the primary for REPLICA_STICKY_SECONDS. For requests
+    whose session can't attribute the write to a user: a new account's row may not
+    have reached the replicas when its first authenticated requests arrive.
+    """
+    if _replica_router is not None:
+        _replica_router.mark_write(user_id)
+
+
+def get_replica_engines() -> List[AsyncEngine]:
+    get_async_engine()
+    return list(_replica_router.engines) if _replica_router is not None else []
+
+
+def async_session() -> AsyncSession:
+    """
+    New session on the API engine, for code that runs outside a request's `deps.get_db`.
+    """
+    get_async_engine()
+    return _sessionmaker()
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _sessionmaker, _replica_router
+    if _async_engine is not None:
+        for replica in get_replica_engines():
+            await replica.dispose()
+        await _async_engine.dispose()
+        _async_engine = None
+        _sessionmaker = None
+        _replica_router = None
+
+
+async def warm_up_pool(connections: int) -> None:
+    """
+    Open `connections` pool connections up front and return them to the pool,
+    so the first requests don't pay for connecting.
+    """
+    engine = get_async_engine()
+
+    async def open_one() -> None:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    # Held concurrently; opened one after another the pool would reuse a single connection
+    await asyncio.gather(*(open_one() for _ in range(connections)))
+
+
+async def check_database(timeout: float) -> Optional[str]:
+    """
+    None if a pooled connection can be checked out and used within `timeout`,
+    otherwise why not. An exhausted pool shows up as a timeout.
+    """
+
+    async def ping() -> None:
+        async with get_async_engine().connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
     try:
-        yield db
-    finally:
-        db.close()
+        await asyncio.wait_for(ping(), timeout=timeout)
+    except asyncio.TimeoutError:
+        return "timed out waiting for a database connection"
+    except Exception as exc:
+        return f"database unavailable: {type(exc).__name__}"
+    return None
+
+
+Base = declarative_base()
+
+
+def get_pool_status() -> dict:
+    pool = get_async_engine().pool
+    status = {
+        "pool_class": type(pool).__name__,
+        "checkouts": pool_wait_stats.checkouts,
+        "total_wait_seconds": round(pool_wait_stats.total_wait, 6),
+        "max_wait_seconds": round(pool_wait_stats.max_wait, 6),
+        "avg_wait_seconds": round(pool_wait_stats.total_wait / pool_wait_stats.checkouts, 6)
+        if pool_wait_stats.checkouts else 0.0,
+    }
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    return status
@@ -0,0 +1,227 @@
+import asyncio
+import json
+from collections import OrderedDict, deque
+from typing import Any, Callable, List, NamedTuple, Optional, Protocol, Tuple
+
+from app.core.config import settings
+
+Handler = Callable[[str], None]
+
+
+class Broker(Protocol):
+    """
+    Carries published change messages to every worker's ChangeFeed, including the publisher's.
+    """
+
+    async def start(self, handler: Handler) -> None: ...
+    async def publish(self, message: str) -> None: ...
+    async def stop(self) -> None: ...
+
+
+class InMemoryBroker:
+    """
+    Single-process broker. Also the local stand-in for the shared broker in tests.
+    """
+
+    def __init__(self):
+        self._handlers: List[Handler] = []
+
+    async def start(self, handler: Handler) -> None:
+        self._handlers.append(handler)
+
+    async def publish(self, message: str) -> None:
+        for handler in self._handlers:
+            handler(message)
+
+    async def stop(self) -> None:
+        self._handlers.clear()
+
+
+class RedisBroker:
+    """
+    Redis pub/sub fan-out for multi-worker deployments. Requires the optional `redis` package.
+    """
+
+    def __init__(self, url: str, channel: str = "grocerywise:changes"):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:
+            raise RuntimeError("CHANGE_FEED_REDIS_URL is set but the 'redis' package is not installed") from exc
+        self._client = redis_asyncio.from_url(url)
+        self.channel = channel
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, handler: Handler) -> None:
+        pubsub = self._client.pubsub()
+        await pubsub.subscribe(self.channel)
+
+        async def listen() -> None:
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    data = message["data"]
+                    handler(data.decode() if isinstance(data, bytes) else data)
+
+        self._task = asyncio.create_task(listen())
+
+    async def publish(self, message: str) -> None:
+        await self._client.publish(self.channel, message)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+class ChangeEvent(NamedTuple):
+    version: int  # the owner's list version after the write
+    index: int  # position of the change within that write
+    type: str  # "created", "updated", "deleted" or "imported"
+    data: Any
+
+    @property
+    def id(self) -> str:
+        return f"{self.version}.{self.index}"
+
+
+def parse_event_id(event_id: str) -> Optional[Tuple[int, int]]:
+    try:
+        version, index = event_id.split(".", 1)
+        return int(version), int(index)
+    except ValueError:
+        return None
+
+
+class Subscription:
+    def __init__(self, owner_id: int, queue_size: int):
+        self.owner_id = owner_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.replay: List[ChangeEvent] = []
+        self.reset = False  # resume point fell out of the replay buffer; client must refetch
+        self.overflowed = False  # fell too far behind; the stream ends and the client resumes
+
+
+class ReplayBuffer:
+    """
+    The owner's most recent events, plus the newest event that has been evicted
+    to make room, which tells whether a resume point is still covered.
+    """
+
+    def __init__(self, size: int):
+        self.events: deque = deque(maxlen=size)
+        self.dropped_through: Optional[Tuple[int, int]] = None
+
+    def extend(self, events: List[ChangeEvent]) -> None:
+        evicted = len(self.events) + len(events) - self.events.maxlen
+        if evicted > 0:
+            last = (list(self.events) + events)[evicted - 1]
+            self.dropped_through = (last.version, last.index)
+        self.events.extend(events)
+
+    def covers(self, position: Tuple[int, int]) -> bool:
+        """
+        Whether every event after `position` is still here. Either the client's
+        event is in the buffer, or it is the newest one evicted. Anything older
+        may have been missed: this buffer only knows what this process received.
+        """
+        if not self.events:
+            return False
+        oldest = self.events[0]
+        return position >= (oldest.version, oldest.index) or position == self.dropped_through
+
+
+class ChangeFeed:
+    """
+    Per-owner grocery change fan-out with a bounded replay buffer for resuming
+    from Last-Event-ID.
+
+    Each subscriber gets a bounded queue. A subscriber that stops draining it is
+    cut off instead of buffering without limit; it reconnects and resumes from
+    its last event id.
+    """
+
+    def __init__(self, broker: Broker, replay_size: int, queue_size: int, max_owners: int = 10000):
+        self.broker = broker
+        self.replay_size = replay_size
+        self.queue_size = queue_size
+        self.max_owners = max_owners
+        self._replay: OrderedDict[int, ReplayBuffer] = OrderedDict()
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self._started = False
+
+    async def start(self) -> None:
+        if not self._started:
+            self._started = True
+            await self.broker.start(self._deliver)
+
+    async def stop(self) -> None:
+        if self._started:
+            self._started = False
+            await self.broker.stop()
+
+    async def publish(self, owner_id: int, version: int, changes: List[Tuple[str, Any]]) -> None:
+        if not changes:
+            return
+        await self.start()
+        await self.broker.publish(json.dumps({"owner_id": owner_id, "version": version, "changes": changes}))
+
+    def _deliver(self, message: str) -> None:
+        payload = json.loads(message)
+        owner_id = payload["owner_id"]
+        events = [
+            ChangeEvent(payload["version"], index, change_type, data)
+            for index, (change_type, data) in enumerate(payload["changes"])
+        ]
+        buffer = self._replay.get(owner_id)
+        if buffer is None:
+            buffer = self._replay[owner_id] = ReplayBuffer(self.replay_size)
+            while len(self._replay) > self.max_owners:
+                self._replay.popitem(last=False)
+        self._replay.move_to_end(owner_id)
+        buffer.extend(events)
+
+        for subscription in list(self._subscribers.get(owner_id, ())):
+            if subscription.overflowed:
+                continue
+            for event in events:
+                try:
+                    subscription.queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    subscription.overflowed = True
+                    # Wake the reader so it notices; a slot is guaranteed after the drop
+                    subscription.queue.get_nowait()
+                    subscription.queue.put_nowait(None)
+                    break
+
+    async def subscribe(self, owner_id: int, last_event_id: Optional[str] = None) -> Subscription:
+        await self.start()
+        subscription = Subscription(owner_id, self.queue_size)
+        # No await between registering and snapshotting the replay, so nothing is missed or repeated
+        self._subscribers.setdefault(owner_id, set()).add(subscription)
+        position = parse_event_id(last_event_id) if last_event_id else None
+        if position is not None:
+            buffer = self._replay.get(owner_id)
+            if buffer is None or not buffer.covers(position):
+                subscription.reset = True
+            else:
+                subscription.replay = [event for event in buffer.events if (event.version, event.index) > position]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.owner_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.owner_id]
+
+
+def _build_broker() -> Broker:
+    if settings.CHANGE_FEED_REDIS_URL:
+        return RedisBroker(settings.CHANGE_FEED_REDIS_URL)
+    return InMemoryBroker()
+
+
+change_feed = ChangeFeed(
+    _build_broker(),
+    replay_size=settings.CHANGE_FEED_REPLAY_SIZE,
+    queue_size=settings.CHANGE_FEED_QUEUE_SIZE,
+)
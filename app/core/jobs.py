@@ -0,0 +1,347 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Protocol
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[..., Awaitable[None]]
+
+
+class Job(NamedTuple):
+    id: str
+    name: str
+    args: Dict[str, Any]  # keyword arguments for the handler; JSON-serializable when durable
+    attempts: int = 0
+    durable: bool = True  # False keeps the job (and its args) out of the store
+
+
+class JobStore(Protocol):
+    """
+    Persistence hook for queued jobs. A job is added before it is queued and
+    removed once it succeeds; jobs still in the store when a worker stops are
+    picked up again by the next start, so delivery is at-least-once.
+    """
+
+    async def add(self, job: Job) -> None: ...
+    async def claim_pending(self) -> List[Job]:
+        """Jobs not leased by a live worker, leased to the caller."""
+        ...
+    async def retry(self, job: Job, delay: float, error: str) -> None: ...
+    async def complete(self, job: Job) -> None: ...
+    async def fail(self, job: Job, error: str) -> None:
+        """Out of attempts: keep the job for inspection, never run it again."""
+        ...
+    async def release(self, jobs: List[Job]) -> None:
+        """Give up the lease on jobs this worker won't run (on shutdown)."""
+        ...
+
+
+class InMemoryJobStore:
+    """
+    Per-process store; queued jobs are lost with the process. Also the stand-in
+    for the durable store in tests.
+    """
+
+    def __init__(self, lease_seconds: float = 300):
+        self.lease_seconds = lease_seconds
+        # id -> (job, leased until)
+        self._jobs: Dict[str, tuple[Job, float]] = {}
+        self.failed: List[tuple[Job, str]] = []
+
+    async def add(self, job: Job) -> None:
+        self._jobs[job.id] = (job, time.time() + self.lease_seconds)
+
+    async def claim_pending(self) -> List[Job]:
+        now = time.time()
+        claimed = [job for job, leased_until in self._jobs.values() if leased_until <= now]
+        for job in claimed:
+            self._jobs[job.id] = (job, now + self.lease_seconds)
+        return claimed
+
+    async def retry(self, job: Job, delay: float, error: str) -> None:
+        self._jobs[job.id] = (job, time.time() + delay + self.lease_seconds)
+
+    async def complete(self, job: Job) -> None:
+        self._jobs.pop(job.id, None)
+
+    async def fail(self, job: Job, error: str) -> None:
+        self._jobs.pop(job.id, None)
+        self.failed.append((job, error))
+
+    async def release(self, jobs: List[Job]) -> None:
+        for job in jobs:
+            if job.id in self._jobs:
+                self._jobs[job.id] = (job, 0.0)
+
+
+class SQLiteJobStore:
+    """
+    Jobs kept in a local SQLite file, so queued work survives restarts and crashes.
+
+    Workers sharing the file each lease the jobs they run; a job whose lease ran
+    out (its worker died) is claimed by the next worker to start.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 300):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        # Opened on first use, so importing the app doesn't touch the file
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Called with the lock held
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    args TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    leased_until REAL NOT NULL,
+                    failed INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT
+                )
+                """
+            )
+            self._connection = connection
+        return self._connection
+
+    def _execute(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    async def add(self, job: Job) -> None:
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO jobs (id, name, args, attempts, leased_until) VALUES (?, ?, ?, ?, ?)",
+            (job.id, job.name, json.dumps(job.args), job.attempts, time.time() + self.lease_seconds),
+        )
+
+    def _claim(self) -> List[Job]:
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            # IMMEDIATE takes the write lock up front, so two workers can't claim the same rows
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                rows = connection.execute(
+                    "SELECT id, name, args, attempts FROM jobs WHERE failed = 0 AND leased_until <= ?", (now,)
+                ).fetchall()
+                connection.executemany(
+                    "UPDATE jobs SET leased_until = ? WHERE id = ?", [(now + self.lease_seconds, row[0]) for row in rows]
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return [Job(job_id, name, json.loads(args), attempts) for job_id, name, args, attempts in rows]
+
+    async def claim_pending(self) -> List[Job]:
+        return await asyncio.to_thread(self._claim)
+
+    async def retry(self, job: Job, delay: float, error: str) -> None:
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE jobs SET attempts = ?, leased_until = ?, last_error = ? WHERE id = ?",
+            (job.attempts, time.time() + delay + self.lease_seconds, error, job.id),
+        )
+
+    async def complete(self, job: Job) -> None:
+        await asyncio.to_thread(self._execute, "DELETE FROM jobs WHERE id = ?", (job.id,))
+
+    async def fail(self, job: Job, error: str) -> None:
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE jobs SET attempts = ?, failed = 1, last_error = ? WHERE id = ?",
+            (job.attempts, error, job.id),
+        )
+
+    async def release(self, jobs: List[Job]) -> None:
+        ids = [(job.id,) for job in jobs if job.durable]
+        if ids:
+            def run() -> None:
+                with self._lock:
+                    self._connect().executemany("UPDATE jobs SET leased_until = 0 WHERE id = ?", ids)
+            await asyncio.to_thread(run)
+
+
+class JobQueue:
+    """
+    In-process queue for work that doesn't need to finish before the response.
+
+    `workers` tasks run jobs off a bounded queue; a failing job is retried with
+    exponential backoff up to `max_attempts` times. Durable jobs are written to
+    the store first. Handlers must be idempotent: after a crash a job can run again.
+    """
+
+    def __init__(self, store: JobStore, workers: int, queue_size: int, max_attempts: int, retry_backoff: float):
+        self.store = store
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._handlers: Dict[str, Handler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._retries: Dict[asyncio.Task, Job] = {}
+        self._running: Dict[asyncio.Task, Job] = {}
+        self.enqueued = 0
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def job(self, name: str) -> Callable[[Handler], Handler]:
+        """Register an async handler under `name`; it is called with the job's args as keywords."""
+        def register(handler: Handler) -> Handler:
+            self._handlers[name] = handler
+            return handler
+        return register
+
+    def _ensure_workers(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        return self._queue
+
+    async def start(self) -> None:
+        """Start the workers and pick up jobs left in the store by earlier runs."""
+        queue = self._ensure_workers()
+        for job in await self.store.claim_pending():
+            if job.name not in self._handlers:
+                await self.store.fail(job, f"no handler registered for {job.name!r}")
+                continue
+            await queue.put(job)
+
+    async def enqueue(self, name: str, *, durable: bool = True, wait: bool = True, **args: Any) -> Optional[Job]:
+        """
+        Queue `name(**args)`. When the queue is full this waits for room, or with
+        wait=False drops the job and returns None (for work that is safe to skip).
+        """
+        if name not in self._handlers:
+            raise ValueError(f"No job handler registered for {name!r}")
+        queue = self._ensure_workers()
+        if not wait and queue.full():
+            self.dropped += 1
+            return None
+        job = Job(uuid.uuid4().hex, name, args, durable=durable)
+        if durable:
+            await self.store.add(job)
+        await queue.put(job)
+        self.enqueued += 1
+        return job
+
+    async def _work(self) -> None:
+        queue = self._queue
+        while True:
+            job = await queue.get()
+            self._running[asyncio.current_task()] = job
+            try:
+                await self._run(job)
+            except Exception:
+                # Only the store can fail here; keep the worker alive
+                logger.exception("Job %s (%s) could not be recorded", job.name, job.id)
+            finally:
+                del self._running[asyncio.current_task()]
+                queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        try:
+            await self._handlers[job.name](**job.args)
+        except Exception as exc:
+            job = job._replace(attempts=job.attempts + 1)
+            error = f"{type(exc).__name__}: {exc}"
+            if job.attempts >= self.max_attempts:
+                self.failed += 1
+                logger.exception("Job %s (%s) failed after %d attempts", job.name, job.id, job.attempts)
+                if job.durable:
+                    await self.store.fail(job, error)
+                return
+            self.retried += 1
+            delay = self.retry_backoff * 2 ** (job.attempts - 1)
+            logger.warning("Job %s (%s) failed, retrying in %.1fs: %s", job.name, job.id, delay, error)
+            if job.durable:
+                await self.store.retry(job, delay, error)
+            task = asyncio.create_task(self._retry_later(job, delay))
+            self._retries[task] = job
+            task.add_done_callback(lambda done: self._retries.pop(done, None))
+            return
+        self.completed += 1
+        if job.durable:
+            await self.store.complete(job)
+
+    async def _retry_later(self, job: Job, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self._queue.put(job)
+
+    async def join(self) -> None:
+        """Wait until every queued job, including pending retries, has finished."""
+        # A failing job schedules its retry before task_done(), so once join() returns
+        # the only work left is in _retries; each retry puts its job back on the queue
+        while self._queue is not None:
+            await self._queue.join()
+            if not self._retries:
+                return
+            await asyncio.wait(set(self._retries))
+
+    async def stop(self, timeout: float) -> None:
+        """
+        Give queued jobs up to `timeout` seconds to finish, then stop the workers.
+        Unfinished durable jobs stay in the store for the next start.
+        """
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        leftover = [*self._running.values(), *self._retries.values()]
+        while not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+        for task in [*self._tasks, *self._retries]:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._retries, return_exceptions=True)
+        if leftover:
+            logger.warning("Stopped with %d unfinished job(s)", len(leftover))
+            await self.store.release(leftover)
+        self._queue = None
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": len(self._running),
+            "retry_pending": len(self._retries),
+            "enqueued": self.enqueued,
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+
+def build_store() -> JobStore:
+    if settings.JOB_STORE_PATH:
+        return SQLiteJobStore(settings.JOB_STORE_PATH, lease_seconds=settings.JOB_LEASE_SECONDS)
+    return InMemoryJobStore(lease_seconds=settings.JOB_LEASE_SECONDS)
+
+
+job_queue = JobQueue(
+    store=build_store(),
+    workers=settings.JOB_WORKERS,
+    queue_size=settings.JOB_QUEUE_SIZE,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    retry_backoff=settings.JOB_RETRY_BACKOFF_SECONDS,
+)
@@ -0,0 +1,290 @@
+import logging
+import time
+from collections import Counter as _Counter
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labels, labels)} {value}" for labels, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+        # Per label set: non-cumulative bucket counts (last slot is +Inf), sum, count
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        counts = entry[0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        else:
+            counts[-1] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                bucket_labels = _format_labels(self.labels, labels, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {count}")
+        return lines
+
+
+class Registry:
+    """
+    Holds the app's metrics and renders them in the Prometheus text format.
+
+    Stats providers (callables returning a flat dict, like `hash_pool.stats`) are
+    read at scrape time and exposed as gauges.
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self._metrics: List[_Metric] = []
+        self._stats: List[Tuple[str, Callable[[], dict]]] = []
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(self.prefix + name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self._add(Gauge(self.prefix + name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(self.prefix + name, help, labels, buckets))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_stats(self, name: str, provider: Callable[[], dict]) -> None:
+        self._stats.append((name, provider))
+
+    def _render_stats(self) -> Iterable[str]:
+        for name, provider in self._stats:
+            for key, value in provider().items():
+                # Numbers only; labels such as the executor kind stay on the JSON endpoints
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                metric = f"{self.prefix}{name}_{key}"
+                yield f"# TYPE {metric} gauge"
+                yield f"{metric} {value}"
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        lines.extend(self._render_stats())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry(prefix="grocerywise_")
+
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "Requests currently being handled.", ("method", "route")
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Request latency, until the response is fully sent.", ("method", "route", "status")
+)
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries", "Database statements executed per request.", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+http_request_db_seconds = registry.histogram(
+    "http_request_db_seconds", "Time spent executing database statements per request.", ("method", "route")
+)
+password_hash_seconds = registry.counter(
+    "password_hash_seconds_total", "Time spent in bcrypt hash/verify (excluding queueing), by route.", ("route",)
+)
+jwt_decode_seconds = registry.counter(
+    "jwt_decode_seconds_total", "Time spent verifying access tokens, by route.", ("route",)
+)
+
+
+class RequestMetrics:
+    """
+    Per-request accumulator, reached through `current_request` from the engine
+    events and the auth helpers.
+    """
+
+    def __init__(self, route: str):
+        self.route = route
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.statements: _Counter = _Counter()
+
+
+current_request: ContextVar[Optional[RequestMetrics]] = ContextVar("current_request", default=None)
+
+
+def _route_label() -> str:
+    request = current_request.get()
+    return request.route if request is not None else "<background>"
+
+
+def record_password_hash(seconds: float) -> None:
+    password_hash_seconds.inc((_route_label(),), seconds)
+
+
+def record_jwt_decode(seconds: float) -> None:
+    jwt_decode_seconds.inc((_route_label(),), seconds)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    request = current_request.get()
+    if request is not None:
+        request.db_queries += 1
+        request.db_seconds += elapsed
+        request.statements[statement] += 1
+    if settings.METRICS_SLOW_QUERY_MS and elapsed * 1000 >= settings.METRICS_SLOW_QUERY_MS:
+        logger.warning("Slow query (%.1f ms) on %s: %s", elapsed * 1000, _route_label(), statement[:500])
+
+
+def install_query_hooks(engine: Engine) -> None:
+    """
+    Time every statement on `engine` (for the async engine, pass its `sync_engine`).
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _report_repeated_statements(method: str, request: RequestMetrics) -> None:
+    threshold = settings.METRICS_N_PLUS_ONE_THRESHOLD
+    if threshold <= 0 or not request.statements:
+        return
+    statement, count = request.statements.most_common(1)[0]
+    if count >= threshold:
+        logger.warning(
+            "Possible N+1: %s %s ran the same statement %d times: %s",
+            method, request.route, count, statement[:500],
+        )
+
+
+def _match_route(scope: dict) -> str:
+    """
+    Path template of the route the request will be dispatched to, so labels stay
+    bounded (`/api/v1/groceries/{item_id}`, not one series per id).
+    """
+    app = scope.get("app")
+    partial = None
+    for route in getattr(getattr(app, "router", None), "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "<unmatched>"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (so streaming responses aren't buffered) recording
+    in-flight counts, latency and per-request query counts by route.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = _match_route(scope)
+        request = RequestMetrics(route)
+        token = current_request.set(request)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc((method, route))
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec((method, route))
+            current_request.reset(token)
+            http_request_duration.observe(time.perf_counter() - start, (method, route, str(status_code)))
+            http_request_db_queries.observe(request.db_queries, (method, route))
+            http_request_db_seconds.observe(request.db_seconds, (method, route))
+            _report_repeated_statements(method, request)
@@ -0,0 +1,194 @@
+import json
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Protocol, Tuple
+
+from starlette.routing import compile_path
+
+from app.core import security
+from app.core.config import settings
+
+
+class BucketStore(Protocol):
+    async def take(self, key: str, capacity: float, refill_rate: float) -> float:
+        """
+        Take one token from `key`'s bucket. Returns 0 if a token was available,
+        otherwise the seconds until one will be.
+        """
+        ...
+
+
+class InMemoryBucketStore:
+    """
+    Per-process token buckets. Also the stand-in for the shared store in tests.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        # key -> (tokens, last refill time)
+        self._buckets: OrderedDict[str, Tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, capacity: float, refill_rate: float) -> float:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = capacity
+            if len(self._buckets) >= self.max_keys:
+                # Dropping the least recently used bucket only ever forgives a client
+                self._buckets.popitem(last=False)
+        else:
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * refill_rate)
+            self._buckets.move_to_end(key)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        return (1 - tokens) / refill_rate
+
+
+# KEYS[1] bucket; ARGV capacity, refill rate, now. Returns the wait in seconds as a string (0 = allowed).
+_REDIS_TAKE = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local tokens = capacity
+if bucket[1] then
+  tokens = math.min(capacity, tonumber(bucket[1]) + (now - tonumber(bucket[2])) * rate)
+end
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBucketStore:
+    """
+    Buckets shared by all workers, updated atomically by a Lua script.
+    Requires the optional `redis` package.
+    """
+
+    def __init__(self, url: str, prefix: str = "grocerywise:ratelimit:"):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL is set but the 'redis' package is not installed") from exc
+        self._client = redis_asyncio.from_url(url)
+        self._script = self._client.register_script(_REDIS_TAKE)
+        self.prefix = prefix
+
+    async def take(self, key: str, capacity: float, refill_rate: float) -> float:
+        wait = await self._script(keys=[self.prefix + key], args=[capacity, refill_rate, time.time()])
+        return float(wait)
+
+
+class RateLimitRule(NamedTuple):
+    method: str  # "*" for any
+    path: str  # route template, e.g. /api/v1/groceries/{item_id}
+    regex: re.Pattern
+    capacity: float  # burst size
+    refill_rate: float  # tokens per second
+    key_by: str  # "ip" or "user"
+
+
+_RULE = re.compile(r"^\s*(\S+)\s+(\S+)\s*=\s*(\d+)\s*/\s*(\d+(?:\.\d+)?)\s*(?::\s*(ip|user))?\s*$")
+
+
+def parse_rules(spec: str) -> List[RateLimitRule]:
+    """
+    Parse "METHOD /path=requests/seconds[:ip|user]" entries separated by commas,
+    e.g. "POST /api/v1/auth/login=10/60:ip, GET /api/v1/groceries/=600/60:user".
+    """
+    rules = []
+    for entry in filter(str.strip, spec.split(",")):
+        match = _RULE.match(entry)
+        if match is None:
+            raise ValueError(f"Invalid rate limit rule: {entry!r}")
+        method, path, requests, seconds, key_by = match.groups()
+        regex, _, _ = compile_path(path)
+        rules.append(RateLimitRule(
+            method.upper(), path, regex, float(requests), float(requests) / float(seconds), key_by or "ip"
+        ))
+    return rules
+
+
+def _user_id(scope: dict) -> Optional[int]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                # Served from the verified-token cache for tokens seen before
+                return security.decode_access_token(token).uid
+            except Exception:
+                return None
+    return None
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI token-bucket limiter. The first rule matching the request's method
+    and path applies; requests over the limit get 429 with Retry-After.
+    Keyed by client IP, or by the token's user id for "user" rules (IP when
+    there is no valid token).
+    """
+
+    def __init__(self, app, rules: List[RateLimitRule], store: BucketStore):
+        self.app = app
+        self.rules = rules
+        self.store = store
+
+    def _match(self, scope: dict) -> Optional[Tuple[int, RateLimitRule]]:
+        method, path = scope["method"], scope["path"]
+        for index, rule in enumerate(self.rules):
+            if (rule.method == "*" or rule.method == method) and rule.regex.match(path):
+                return index, rule
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.rules:
+            await self.app(scope, receive, send)
+            return
+        matched = self._match(scope)
+        if matched is None:
+            await self.app(scope, receive, send)
+            return
+        index, rule = matched
+        subject = None
+        if rule.key_by == "user":
+            user_id = _user_id(scope)
+            subject = f"user:{user_id}" if user_id is not None else None
+        if subject is None:
+            client = scope.get("client")
+            subject = f"ip:{client[0] if client else 'unknown'}"
+
+        wait = await self.store.take(f"{index}:{subject}", rule.capacity, rule.refill_rate)
+        if not wait:
+            await self.app(scope, receive, send)
+            return
+        body = json.dumps({"detail": "Too many requests"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(wait)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def build_store() -> BucketStore:
+    if settings.RATE_LIMIT_REDIS_URL:
+        return RedisBucketStore(settings.RATE_LIMIT_REDIS_URL)
+    return InMemoryBucketStore(max_keys=settings.RATE_LIMIT_MAX_KEYS)
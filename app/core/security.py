@@ -1,33 +1,117 @@
+import asyncio
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Union, Optional
+from typing import Any, Callable, Union, Optional
 
 from jose import jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core import metrics
 from app.core.config import settings
+from app.core.jobs import job_queue
 from app.models import models
+from app.schemas import schemas
 from app.crud import users as crud_users
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with fewer rounds than configured report needs_update and are rehashed on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
 
 ALGORITHM = settings.ALGORITHM
 
 
 def create_access_token(
-    sub: Union[str, Any], expires_delta: Optional[timedelta] = None
+    sub: Union[str, Any], expires_delta: Optional[timedelta] = None, uid: Optional[int] = None
 ) -> str:
+    now = datetime.now(timezone.utc)
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(
+        expire = now + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(sub)}
+    to_encode = {"exp": expire, "iat": now, "sub": str(sub)}
+    if uid is not None:
+        to_encode["uid"] = uid
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+class VerifiedTokenCache:
+    """
+    LRU of tokens whose signature and claims were already checked, kept until they expire.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data: OrderedDict[str, tuple[float, schemas.TokenData]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[schemas.TokenData]:
+        entry = self._data.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, token_data = entry
+        if expires_at <= time.time():
+            del self._data[token]
+            self.misses += 1
+            return None
+        self._data.move_to_end(token)
+        self.hits += 1
+        return token_data
+
+    def set(self, token: str, expires_at: float, token_data: schemas.TokenData) -> None:
+        if self.max_size <= 0:
+            return
+        self._data[token] = (expires_at, token_data)
+        self._data.move_to_end(token)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+token_cache = VerifiedTokenCache(max_size=settings.TOKEN_CACHE_MAX_SIZE)
+
+
+def decode_access_token(token: str) -> schemas.TokenData:
+    """
+    Verify an access token and return its claims.
+
+    Raises JWTError for a bad signature, expired token or missing claim, and
+    ValidationError if the subject isn't an email.
+    """
+    token_data = token_cache.get(token)
+    if token_data is not None:
+        return token_data
+    start = time.perf_counter()
+    try:
+        payload = jwt.decode(
+            token,
+            settings.SECRET_KEY,
+            algorithms=[settings.ALGORITHM],
+            options={"require_exp": True, "require_iat": True, "require_sub": True},
+        )
+    finally:
+        metrics.record_jwt_decode(time.perf_counter() - start)
+    token_data = schemas.TokenData(email=payload["sub"], uid=payload.get("uid"))
+    token_cache.set(token, float(payload["exp"]), token_data)
+    return token_data
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -35,13 +119,101 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[models.User]:
+
+class HashPool:
+    """
+    Runs bcrypt hash/verify calls on a worker pool so they don't hold the event loop.
+
+    At most `max_concurrency` calls are submitted at once; the rest wait in line,
+    and the number waiting is reported as the queue depth.
+    """
+
+    def __init__(self, kind: str, workers: int, max_concurrency: int):
+        self.kind = kind
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.max_queued = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pwd-hash")
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self.running += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            metrics.record_password_hash(time.perf_counter() - start)
+            self.running -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "max_concurrency": self.max_concurrency,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "max_queued": self.max_queued,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+hash_pool = HashPool(
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_concurrency=settings.PASSWORD_HASH_MAX_CONCURRENCY,
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await hash_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await hash_pool.run(get_password_hash, password)
+
+
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[models.User]:
     """
     Authenticate a user.
     """
-    user = crud_users.get_user_by_email(db, email=email)
+    user = await crud_users.get_user_by_email(db, email=email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
+    if pwd_context.needs_update(user.hashed_password):
+        # Hashing at the new cost takes as long again as the verify; do it after the response.
+        # Not durable, so the password never reaches the job store; skipped when the queue is
+        # full, and tried again on the next login
+        await job_queue.enqueue(
+            "rehash_password", durable=False, wait=False,
+            user_id=user.id, old_hash=user.hashed_password, password=password,
+        )
     return user
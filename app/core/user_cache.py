@@ -0,0 +1,126 @@
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Protocol
+
+from app.core.config import settings
+from app.models import models
+
+# Columns copied into the cached principal. The password hash is left out so it never
+# sits in a shared cache; code that needs it loads it with crud users.get_password_hash
+PRINCIPAL_COLUMNS = ("id", "email", "is_active", "created_at", "updated_at")
+_DATETIME_COLUMNS = ("created_at", "updated_at")
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> Optional[str]: ...
+    async def set(self, key: str, value: str, ttl: int) -> None: ...
+    async def delete(self, key: str) -> None: ...
+
+
+class InMemoryBackend:
+    """
+    Per-process TTL + LRU store. Also the stand-in for the shared backend in tests.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._data: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+
+class RedisBackend:
+    """
+    Shared store for multi-worker deployments, so an invalidation on one worker
+    is seen by all of them. Requires the optional `redis` package.
+    """
+
+    def __init__(self, url: str, prefix: str = "grocerywise:principal:"):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:
+            raise RuntimeError("USER_CACHE_REDIS_URL is set but the 'redis' package is not installed") from exc
+        self._client = redis_asyncio.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self._client.get(self.prefix + key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        await self._client.set(self.prefix + key, value, ex=ttl)
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(self.prefix + key)
+
+
+class UserCache:
+    """
+    Caches the authenticated user's row keyed by token subject, so
+    get_current_user can skip the per-request user lookup.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, subject: str) -> Optional[dict]:
+        if self.ttl <= 0:
+            return None
+        raw = await self.backend.get(subject)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Entries written by older versions may carry extra columns; only rebuild the known ones
+        data = {column: value for column, value in json.loads(raw).items() if column in PRINCIPAL_COLUMNS}
+        for column in _DATETIME_COLUMNS:
+            if data[column] is not None:
+                data[column] = datetime.fromisoformat(data[column])
+        return data
+
+    async def set(self, subject: str, user: models.User) -> None:
+        if self.ttl <= 0:
+            return
+        data = {column: getattr(user, column) for column in PRINCIPAL_COLUMNS}
+        for column in _DATETIME_COLUMNS:
+            if data[column] is not None:
+                data[column] = data[column].isoformat()
+        await self.backend.set(subject, json.dumps(data), self.ttl)
+
+    async def invalidate(self, subject: str) -> None:
+        await self.backend.delete(subject)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def _build_backend() -> CacheBackend:
+    if settings.USER_CACHE_REDIS_URL:
+        return RedisBackend(settings.USER_CACHE_REDIS_URL)
+    return InMemoryBackend(max_size=settings.USER_CACHE_MAX_SIZE)
+
+
+user_cache = UserCache(_build_backend(), ttl=settings.USER_CACHE_TTL_SECONDS)
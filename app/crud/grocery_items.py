@@ -1,30 +1,386 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import Row, bindparam, delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
+from app.core.events import change_feed
+from app.crud import grocery_summaries
 from app.models import models
 from app.schemas import schemas
 
-def get_grocery_item(db: Session, item_id: int) -> Optional[models.GroceryItem]:
-    return db.query(models.GroceryItem).filter(models.GroceryItem.id == item_id).first()
+async def get_grocery_item(db: AsyncSession, item_id: int) -> Optional[models.GroceryItem]:
+    result = await db.execute(select(models.GroceryItem).where(models.GroceryItem.id == item_id))
+    return result.scalars().first()
 
-def get_grocery_items_by_owner(db: Session, owner_id: int, skip: int = 0, limit: int = 100) -> List[models.GroceryItem]:
-    return db.query(models.GroceryItem).filter(models.GroceryItem.owner_id == owner_id).offset(skip).limit(limit).all()
+async def get_grocery_item_for_owner(db: AsyncSession, item_id: int, owner_id: int) -> Optional[models.GroceryItem]:
+    result = await db.execute(
+        select(models.GroceryItem).where(models.GroceryItem.id == item_id, models.GroceryItem.owner_id == owner_id)
+    )
+    return result.scalars().first()
 
-def create_grocery_item(db: Session, item: schemas.GroceryItemCreate, owner_id: int) -> models.GroceryItem:
+async def grocery_item_exists(db: AsyncSession, item_id: int) -> bool:
+    result = await db.execute(select(models.GroceryItem.id).where(models.GroceryItem.id == item_id))
+    return result.scalar() is not None
+
+SORT_COLUMNS = {
+    "id": models.GroceryItem.id,
+    "name": models.GroceryItem.name,
+    "created_at": models.GroceryItem.created_at,
+}
+
+# The response schema's fields, in its order: list rows are serialized straight from these
+ITEM_COLUMNS = tuple(models.GroceryItem.__table__.c[name] for name in schemas.GroceryItem.model_fields)
+
+def _apply_filters(query, filters: Optional[schemas.GroceryItemFilter]):
+    if filters is None:
+        return query
+    if filters.status is not None:
+        query = query.where(models.GroceryItem.status == filters.status)
+    if filters.name_prefix:
+        query = query.where(models.GroceryItem.name.istartswith(filters.name_prefix, autoescape=True))
+    if filters.q:
+        query = query.where(models.GroceryItem.name.icontains(filters.q, autoescape=True))
+    if filters.created_after is not None:
+        query = query.where(models.GroceryItem.created_at >= filters.created_after)
+    if filters.created_before is not None:
+        query = query.where(models.GroceryItem.created_at < filters.created_before)
+    return query
+
+async def get_grocery_items_by_owner(
+    db: AsyncSession,
+    owner_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    filters: Optional[schemas.GroceryItemFilter] = None,
+    sort: schemas.GroceryItemSort = "id",
+) -> List[Row]:
+    """
+    A page of the owner's items as plain rows of ITEM_COLUMNS, without building ORM objects.
+    """
+    column = SORT_COLUMNS[sort.lstrip("-")]
+    descending = sort.startswith("-")
+    # id breaks ties so pages are stable for non-unique sort keys
+    order_by = [column.desc(), models.GroceryItem.id.desc()] if descending else [column, models.GroceryItem.id]
+    query = _apply_filters(select(*ITEM_COLUMNS).where(models.GroceryItem.owner_id == owner_id), filters)
+    result = await db.execute(query.order_by(*order_by).offset(skip).limit(limit))
+    return list(result.all())
+
+async def get_grocery_items_by_owner_keyset(
+    db: AsyncSession,
+    owner_id: int,
+    after_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    limit: int = 100,
+    filters: Optional[schemas.GroceryItemFilter] = None,
+) -> Tuple[List[Row], bool]:
+    """
+    Page through an owner's items on the (owner_id, id) index instead of OFFSET.
+
+    Returns the page as rows of ITEM_COLUMNS in ascending id order and whether more rows exist beyond it
+    in the direction of travel (after `after_id`, or before `before_id`).
+    """
+    query = _apply_filters(select(*ITEM_COLUMNS).where(models.GroceryItem.owner_id == owner_id), filters)
+    if before_id is not None:
+        query = query.where(models.GroceryItem.id < before_id).order_by(models.GroceryItem.id.desc())
+    else:
+        if after_id is not None:
+            query = query.where(models.GroceryItem.id > after_id)
+        query = query.order_by(models.GroceryItem.id)
+    # Fetch one extra row to learn whether another page exists
+    result = await db.execute(query.limit(limit + 1))
+    items = list(result.all())
+    has_more = len(items) > limit
+    items = items[:limit]
+    if before_id is not None:
+        items.reverse()
+    return items, has_more
+
+async def get_list_version(db: AsyncSession, owner_id: int) -> int:
+    """
+    Version of the owner's item list; a primary-key read on users, not a scan of grocery_items.
+    """
+    result = await db.execute(select(models.User.items_version).where(models.User.id == owner_id))
+    return result.scalar() or 0
+
+async def bump_list_version(db: AsyncSession, owner_id: int) -> int:
+    # Runs inside the caller's transaction so the version moves with the write.
+    # Core UPDATE and updated_at pinned: this isn't a change to the user itself.
+    users = models.User.__table__
+    result = await db.execute(
+        update(users)
+        .where(users.c.id == owner_id)
+        .values(items_version=users.c.items_version + 1, updated_at=users.c.updated_at)
+        .returning(users.c.items_version)
+    )
+    return result.scalar_one()
+
+async def write_tombstones(db: AsyncSession, owner_id: int, version: int, item_ids: List[int]) -> None:
+    if item_ids:
+        await db.execute(
+            insert(models.GroceryItemTombstone.__table__),
+            [{"owner_id": owner_id, "item_id": item_id, "version": version} for item_id in item_ids],
+        )
+
+async def delete_tombstones(db: AsyncSession, owner_id: int) -> None:
+    """
+    Drop all of the owner's tombstones, when the owner is deleted: nobody can sync
+    their list any more, and on SQLite their ids can be reused by a new account. Does not commit.
+    """
+    tombstones = models.GroceryItemTombstone.__table__
+    await db.execute(delete(tombstones).where(tombstones.c.owner_id == owner_id))
+
+async def get_grocery_item_changes(
+    db: AsyncSession, owner_id: int, since: Optional[int]
+) -> Tuple[List[models.GroceryItem], List[int], int]:
+    """
+    Items created or updated and ids deleted after version `since`, up to the
+    current list version, which is returned as the next sync point.
+
+    Both reads are range scans on the (owner_id, version) indexes, so the cost
+    follows the number of changes rather than the list size. Without `since`
+    every item is returned and there are no deletions to report.
+    """
+    current = await get_list_version(db, owner_id)
+    items = models.GroceryItem
+    # Capped at `current` so a write landing mid-read is picked up by the next sync instead
+    query = select(items).where(items.owner_id == owner_id, items.version <= current)
+    if since is None:
+        result = await db.execute(query.order_by(items.id))
+        return list(result.scalars().all()), [], current
+    result = await db.execute(query.where(items.version > since).order_by(items.version, items.id))
+    changed = list(result.scalars().all())
+    tombstones = models.GroceryItemTombstone
+    result = await db.execute(
+        select(tombstones.item_id)
+        .where(tombstones.owner_id == owner_id, tombstones.version > since, tombstones.version <= current)
+        .order_by(tombstones.version, tombstones.item_id)
+    )
+    return changed, list(result.scalars().all()), current
+
+def _item_payload(item: models.GroceryItem) -> dict:
+    return schemas.GroceryItem.model_validate(item).model_dump(mode="json")
+
+EXPORT_COLUMNS = ("id", "name", "quantity", "status", "owner_id", "created_at", "updated_at")
+
+async def stream_grocery_items_by_owner(
+    db: AsyncSession, owner_id: int, chunk_size: int = 1000
+) -> AsyncIterator[Sequence[Any]]:
+    """
+    Yield an owner's items as chunks of plain rows (EXPORT_COLUMNS order) from a
+    server-side cursor, so memory stays flat no matter how many rows there are.
+    """
+    table = models.GroceryItem.__table__
+    stmt = (
+        select(*(table.c[column] for column in EXPORT_COLUMNS))
+        .where(table.c.owner_id == owner_id)
+        .order_by(table.c.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    result = await db.stream(stmt)
+    async for partition in result.partitions():
+        yield partition
+
+async def create_grocery_item(db: AsyncSession, item: schemas.GroceryItemCreate, owner_id: int) -> models.GroceryItem:
     db_item = models.GroceryItem(**item.model_dump(), owner_id=owner_id)
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
+    version = await bump_list_version(db, owner_id)
+    db_item.version = version
+    await grocery_summaries.apply_counter_deltas(
+        db, owner_id, grocery_summaries.add_items(grocery_summaries.new_deltas(), [(item.status, item.quantity)])
+    )
+    await db.commit()
+    await change_feed.publish(owner_id, version, [("created", _item_payload(db_item))])
     return db_item
 
-def update_grocery_item(db: Session, db_item: models.GroceryItem, item_update: schemas.GroceryItemUpdate) -> models.GroceryItem:
+async def update_grocery_item(
+    db: AsyncSession, item_id: int, owner_id: int, item_update: schemas.GroceryItemUpdate
+) -> Optional[models.GroceryItem]:
+    """
+    UPDATE ... WHERE id AND owner_id RETURNING the row. None if no item matched.
+    """
     update_data = item_update.model_dump(exclude_unset=True) # Get only provided fields
-    for key, value in update_data.items():
-        setattr(db_item, key, value)
-    db.commit()
-    db.refresh(db_item)
+    if not update_data:
+        return await get_grocery_item_for_owner(db, item_id=item_id, owner_id=owner_id)
+    # Bump first: every write path locks the owner's users row before any item row,
+    # so concurrent writes for one owner can't deadlock. Also stamps the row below
+    version = await bump_list_version(db, owner_id)
+    old = None
+    if "status" in update_data or "quantity" in update_data:
+        # The summary counters need the old values; only read them when they can change
+        result = await db.execute(
+            select(models.GroceryItem.status, models.GroceryItem.quantity)
+            .where(models.GroceryItem.id == item_id, models.GroceryItem.owner_id == owner_id)
+            .with_for_update()
+        )
+        old = result.first()
+        if old is None:
+            # Undo the bump; nothing changed
+            await db.rollback()
+            return None
+    result = await db.execute(
+        update(models.GroceryItem)
+        .where(models.GroceryItem.id == item_id, models.GroceryItem.owner_id == owner_id)
+        .values(**update_data, version=version)
+        .returning(models.GroceryItem)
+        .execution_options(populate_existing=True)
+    )
+    db_item = result.scalars().first()
+    if db_item is None:
+        # Undo the bump; nothing changed
+        await db.rollback()
+        return None
+    if old is not None:
+        deltas = grocery_summaries.add_items(grocery_summaries.new_deltas(), [tuple(old)], sign=-1)
+        grocery_summaries.add_items(deltas, [(db_item.status, db_item.quantity)])
+        await grocery_summaries.apply_counter_deltas(db, owner_id, deltas)
+    await db.commit()
+    await change_feed.publish(owner_id, version, [("updated", _item_payload(db_item))])
     return db_item
 
-def delete_grocery_item(db: Session, db_item: models.GroceryItem) -> None:
-    db.delete(db_item)
-    db.commit()
+async def delete_grocery_item(db: AsyncSession, item_id: int, owner_id: int) -> bool:
+    """
+    DELETE ... WHERE id AND owner_id. Returns whether an item was deleted.
+    """
+    # Owner's users row first, like every other write path (lock order)
+    version = await bump_list_version(db, owner_id)
+    result = await db.execute(
+        delete(models.GroceryItem)
+        .where(models.GroceryItem.id == item_id, models.GroceryItem.owner_id == owner_id)
+        .returning(models.GroceryItem.status, models.GroceryItem.quantity)
+    )
+    row = result.first()
+    if row is None:
+        # Undo the bump; nothing changed
+        await db.rollback()
+        return False
+    await write_tombstones(db, owner_id, version, [item_id])
+    await grocery_summaries.apply_counter_deltas(
+        db, owner_id, grocery_summaries.add_items(grocery_summaries.new_deltas(), [tuple(row)], sign=-1)
+    )
+    await db.commit()
+    await change_feed.publish(owner_id, version, [("deleted", {"id": item_id})])
+    return True
+
+async def bulk_apply_grocery_items(
+    db: AsyncSession,
+    owner_id: int,
+    creates: List[schemas.GroceryItemCreate],
+    updates: List[schemas.GroceryItemBulkUpdate],
+    deletes: List[int],
+) -> Tuple[List[models.GroceryItem], Dict[int, models.GroceryItem], List[int]]:
+    """
+    Apply a batch of creates, updates and deletes for one owner in a single transaction.
+
+    Returns the created items (in request order), the updated items keyed by id and
+    the deleted ids. Ids missing from the last two were not found for this owner.
+    """
+    table = models.GroceryItem.__table__
+    created: List[models.GroceryItem] = []
+    updated: Dict[int, models.GroceryItem] = {}
+    deleted: List[int] = []
+    deltas = grocery_summaries.new_deltas()
+    if not (creates or updates or deletes):
+        return created, updated, deleted
+    # Bump first so created and updated rows are stamped with the new version
+    version = await bump_list_version(db, owner_id)
+
+    if creates:
+        # One multi-row INSERT ... RETURNING
+        result = await db.scalars(
+            insert(models.GroceryItem).returning(models.GroceryItem, sort_by_parameter_order=True),
+            [{**item.model_dump(), "owner_id": owner_id, "version": version} for item in creates],
+        )
+        created = list(result.all())
+        grocery_summaries.add_items(deltas, [(item.status, item.quantity) for item in created])
+
+    if updates:
+        # Old status/quantity of rows whose counters can move, read before they change
+        counted_ids = {item.id for item in updates if item.status is not None or item.quantity is not None}
+        old_values = {}
+        if counted_ids:
+            result = await db.execute(
+                select(table.c.id, table.c.status, table.c.quantity)
+                .where(table.c.owner_id == owner_id, table.c.id.in_(counted_ids))
+                .with_for_update()
+            )
+            old_values = {row.id: (row.status, row.quantity) for row in result.all()}
+
+        # One executemany UPDATE per distinct set of changed fields, always scoped to the owner
+        groups: Dict[Tuple[str, ...], List[dict]] = {}
+        for item in updates:
+            fields = item.model_dump(exclude_unset=True, exclude={"id"})
+            if fields:
+                groups.setdefault(tuple(sorted(fields)), []).append(
+                    {"b_id": item.id, **{f"v_{key}": value for key, value in fields.items()}}
+                )
+        for keys, params in groups.items():
+            stmt = (
+                update(table)
+                .where(table.c.owner_id == owner_id, table.c.id == bindparam("b_id"))
+                .values({**{key: bindparam(f"v_{key}") for key in keys}, "version": version})
+            )
+            await db.execute(stmt, params)
+        result = await db.scalars(
+            select(models.GroceryItem)
+            .where(models.GroceryItem.owner_id == owner_id, models.GroceryItem.id.in_({item.id for item in updates}))
+            .execution_options(populate_existing=True)
+        )
+        updated = {item.id: item for item in result.all()}
+        for item_id, old in old_values.items():
+            grocery_summaries.add_items(deltas, [old], sign=-1)
+            grocery_summaries.add_items(deltas, [(updated[item_id].status, updated[item_id].quantity)])
+
+    if deletes:
+        result = await db.execute(
+            delete(table)
+            .where(table.c.owner_id == owner_id, table.c.id.in_(set(deletes)))
+            .returning(table.c.id, table.c.status, table.c.quantity)
+        )
+        rows = result.all()
+        deleted = [row.id for row in rows]
+        await write_tombstones(db, owner_id, version, deleted)
+        grocery_summaries.add_items(deltas, [(row.status, row.quantity) for row in rows], sign=-1)
+
+    if not (created or updated or deleted):
+        # Undo the bump; nothing matched
+        await db.rollback()
+        return created, updated, deleted
+    await grocery_summaries.apply_counter_deltas(db, owner_id, deltas)
+    await db.commit()
+    await change_feed.publish(
+        owner_id,
+        version,
+        [("created", _item_payload(item)) for item in created]
+        + [("updated", _item_payload(item)) for item in updated.values()]
+        + [("deleted", {"id": item_id}) for item_id in deleted],
+    )
+    return created, updated, deleted
+
+async def import_grocery_items(db: AsyncSession, owner_id: int, items: List[schemas.GroceryItemCreate]) -> int:
+    """
+    Insert one chunk of already-validated items and commit it.
+
+    Uses COPY on Postgres (asyncpg) and an executemany INSERT elsewhere.
+    Returns the number of rows inserted.
+    """
+    if not items:
+        return 0
+    # Bump first so the COPY below runs inside the transaction it opens, and to stamp the rows
+    version = await bump_list_version(db, owner_id)
+    rows = [(item.name, item.quantity, item.status.value, owner_id, version) for item in items]
+    columns = ("name", "quantity", "status", "owner_id", "version")
+    await grocery_summaries.apply_counter_deltas(
+        db, owner_id, grocery_summaries.add_items(grocery_summaries.new_deltas(), [(item.status, item.quantity) for item in items])
+    )
+    dialect = db.get_bind().dialect
+    if dialect.name == "postgresql" and dialect.driver == "asyncpg":
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            models.GroceryItem.__tablename__, records=rows, columns=columns
+        )
+    else:
+        await db.execute(insert(models.GroceryItem.__table__), [dict(zip(columns, row)) for row in rows])
+    await db.commit()
+    # One coarse event per chunk; subscribers refetch rather than receive every row
+    await change_feed.publish(owner_id, version, [("imported", {"count": len(rows)})])
+    return len(rows)
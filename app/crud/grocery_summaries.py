@@ -0,0 +1,128 @@
+from collections import defaultdict
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.models import models
+
+# status -> [item count delta, total quantity delta]
+CounterDeltas = Dict[models.GroceryStatus, List[int]]
+
+
+def new_deltas() -> CounterDeltas:
+    return defaultdict(lambda: [0, 0])
+
+
+def add_items(deltas: CounterDeltas, rows: Iterable[Tuple[models.GroceryStatus, int]], sign: int = 1) -> CounterDeltas:
+    """
+    Record (status, quantity) rows being added (sign=1) or removed (sign=-1).
+    """
+    for status, quantity in rows:
+        entry = deltas[models.GroceryStatus(status)]
+        entry[0] += sign
+        entry[1] += sign * quantity
+    return deltas
+
+
+def _dialect_insert(db: AsyncSession):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+
+async def apply_counter_deltas(db: AsyncSession, owner_id: int, deltas: CounterDeltas) -> None:
+    """
+    Add the deltas to the owner's counters inside the caller's transaction.
+    """
+    table = models.GroceryItemCounter.__table__
+    insert = _dialect_insert(db)
+    for status, (count_delta, quantity_delta) in deltas.items():
+        if not count_delta and not quantity_delta:
+            continue
+        if insert is not None:
+            stmt = insert(table).values(
+                owner_id=owner_id, status=status, item_count=count_delta, total_quantity=quantity_delta
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.owner_id, table.c.status],
+                set_={
+                    "item_count": table.c.item_count + stmt.excluded.item_count,
+                    "total_quantity": table.c.total_quantity + stmt.excluded.total_quantity,
+                },
+            )
+            await db.execute(stmt)
+            continue
+        # No upsert on this dialect: update, then insert if there was no row
+        result = await db.execute(
+            update(table)
+            .where(table.c.owner_id == owner_id, table.c.status == status)
+            .values(item_count=table.c.item_count + count_delta, total_quantity=table.c.total_quantity + quantity_delta)
+        )
+        if result.rowcount == 0:
+            await db.execute(
+                table.insert().values(
+                    owner_id=owner_id, status=status, item_count=count_delta, total_quantity=quantity_delta
+                )
+            )
+
+
+async def get_summary(db: AsyncSession, owner_id: int) -> Dict[models.GroceryStatus, Tuple[int, int]]:
+    """
+    (item count, total quantity) per status, read from the counters (one row per status).
+    """
+    table = models.GroceryItemCounter.__table__
+    result = await db.execute(
+        select(table.c.status, table.c.item_count, table.c.total_quantity).where(table.c.owner_id == owner_id)
+    )
+    summary = {status: (0, 0) for status in models.GroceryStatus}
+    for status, item_count, total_quantity in result.all():
+        summary[status] = (item_count, total_quantity)
+    return summary
+
+
+async def rebuild_counters(db: AsyncSession, owner_id: Optional[int] = None, fix: bool = True) -> List[dict]:
+    """
+    Recount grocery_items and compare with the stored counters.
+
+    Returns one entry per (owner, status) that had drifted; with fix=True the
+    counters are rewritten from the recount and committed.
+    """
+    items = models.GroceryItem.__table__
+    counters = models.GroceryItemCounter.__table__
+
+    actual_query = select(
+        items.c.owner_id, items.c.status, func.count(), func.coalesce(func.sum(items.c.quantity), 0)
+    ).group_by(items.c.owner_id, items.c.status)
+    stored_query = select(counters.c.owner_id, counters.c.status, counters.c.item_count, counters.c.total_quantity)
+    if owner_id is not None:
+        actual_query = actual_query.where(items.c.owner_id == owner_id)
+        stored_query = stored_query.where(counters.c.owner_id == owner_id)
+
+    actual = {(row[0], row[1]): (row[2], row[3]) for row in (await db.execute(actual_query)).all()}
+    stored = {(row[0], row[1]): (row[2], row[3]) for row in (await db.execute(stored_query)).all()}
+
+    drift = []
+    for key in sorted(set(actual) | set(stored), key=lambda key: (key[0], key[1].value)):
+        expected = actual.get(key, (0, 0))
+        found = stored.get(key, (0, 0))
+        if expected != found:
+            drift.append({
+                "owner_id": key[0],
+                "status": key[1].value,
+                "stored": {"item_count": found[0], "total_quantity": found[1]},
+                "actual": {"item_count": expected[0], "total_quantity": expected[1]},
+            })
+
+    if fix and drift:
+        for entry in drift:
+            owner, status = entry["owner_id"], models.GroceryStatus(entry["status"])
+            await db.execute(delete(counters).where(counters.c.owner_id == owner, counters.c.status == status))
+            if entry["actual"]["item_count"]:
+                await db.execute(counters.insert().values(owner_id=owner, status=status, **entry["actual"]))
+        await db.commit()
+    return drift
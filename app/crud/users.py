@@ -1,43 +1,135 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
 from app.models import models
 from app.schemas import schemas
-from app.core.security import get_password_hash
+from app.core import security
+from app.core.database import async_session
+from app.core.jobs import job_queue
+from app.core.user_cache import user_cache
+from app.crud import grocery_items
 
-def get_user(db: Session, user_id: int) -> Optional[models.User]:
-    return db.query(models.User).filter(models.User.id == user_id).first()
+async def get_user(db: AsyncSession, user_id: int) -> Optional[models.User]:
+    result = await db.execute(select(models.User).where(models.User.id == user_id))
+    return result.scalars().first()
 
-def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
-    return db.query(models.User).filter(models.User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[models.User]:
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100) -> list[models.User]:
-    return db.query(models.User).offset(skip).limit(limit).all()
+async def get_password_hash(db: AsyncSession, user_id: int) -> Optional[str]:
+    # Principals from user_cache don't carry the hash; load it only where a password is checked
+    return await db.scalar(select(models.User.hashed_password).where(models.User.id == user_id))
 
-def create_user(db: Session, user: schemas.UserCreate) -> models.User:
-    hashed_password = get_password_hash(user.password)
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100) -> list[models.User]:
+    result = await db.execute(select(models.User).offset(skip).limit(limit))
+    return list(result.scalars().all())
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate) -> models.User:
+    hashed_password = await security.get_password_hash_async(user.password)
     db_user = models.User(email=user.email, hashed_password=hashed_password)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
     return db_user
 
-def update_user(db: Session, user: models.User, user_update: schemas.UserUpdate) -> models.User:
+async def update_user(db: AsyncSession, user: models.User, user_update: schemas.UserUpdate) -> models.User:
     # Currently, no fields are directly updatable via UserUpdate schema
     # Password update is handled separately. Email changes might need verification.
     # If you add fields like 'is_active' to UserUpdate, update them here.
     # e.g., if user_update.is_active is not None: user.is_active = user_update.is_active
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    # Covers deactivation once is_active becomes updatable
+    await user_cache.invalidate(user.email)
     return user
 
-def update_user_password(db: Session, user: models.User, new_password: str) -> models.User:
-    user.hashed_password = get_password_hash(new_password)
-    db.commit()
-    db.refresh(user)
+async def update_user_password(db: AsyncSession, user: models.User, new_password: str) -> models.User:
+    user.hashed_password = await security.get_password_hash_async(new_password)
+    await db.commit()
+    await user_cache.invalidate(user.email)
     return user
 
-def delete_user(db: Session, user: models.User) -> None:
-    # Note: Related grocery items will be deleted due to cascade="all, delete-orphan"
-    db.delete(user)
-    db.commit()
+async def rehash_password(db: AsyncSession, user_id: int, old_hash: str, password: str) -> bool:
+    """
+    Replace `old_hash` with a hash at the current cost. Returns False if the
+    password changed in the meantime (the newer hash is kept).
+    """
+    new_hash = await security.get_password_hash_async(password)
+    result = await db.execute(
+        update(models.User)
+        .where(models.User.id == user_id, models.User.hashed_password == old_hash)
+        .values(hashed_password=new_hash)
+        .returning(models.User.email)
+    )
+    email = result.scalar_one_or_none()
+    await db.commit()
+    if email is None:
+        return False
+    await user_cache.invalidate(email)
+    return True
+
+async def delete_user(db: AsyncSession, user: models.User) -> None:
+    """
+    Mark the account for deletion and queue the deletion of its data.
+
+    The request only writes the user row, whatever the size of the list; the
+    account is also deactivated so it can't authenticate from here on, and
+    purge_user removes it and its items in the background.
+    """
+    user.is_active = False
+    user.deletion_requested_at = func.now()
+    await db.commit()
+    await user_cache.invalidate(user.email)
+    await job_queue.enqueue("purge_user", user_id=user.id)
+
+async def purge_user(db: AsyncSession, user_id: int) -> bool:
+    """
+    Delete a user marked by delete_user in one transaction; their items and
+    counters go with the user row through ON DELETE CASCADE, without being
+    loaded. Returns False if there was no such marked user (already purged),
+    which makes it safe to run again. Merely deactivated users are never touched.
+    """
+    result = await db.execute(
+        select(models.User.id)
+        .where(models.User.id == user_id, models.User.deletion_requested_at.is_not(None))
+        .with_for_update()
+    )
+    if result.scalar_one_or_none() is None:
+        await db.rollback()
+        return False
+    # Tombstones have no foreign key to cascade through; no one is left to sync them
+    await grocery_items.delete_tombstones(db, user_id)
+    await db.execute(delete(models.User).where(models.User.id == user_id))
+    await db.commit()
+    return True
+
+
+async def get_pending_purge_ids(db: AsyncSession) -> list[int]:
+    """
+    Users marked for deletion by delete_user whose purge hasn't run yet.
+    """
+    result = await db.execute(select(models.User.id).where(models.User.deletion_requested_at.is_not(None)))
+    return list(result.scalars().all())
+
+
+@job_queue.job("purge_user")
+async def _purge_user_job(user_id: int) -> None:
+    async with async_session() as db:
+        await purge_user(db, user_id)
+
+
+@job_queue.job("resume_purges")
+async def _resume_purges_job() -> None:
+    # The marked rows are the durable record of pending deletions: a purge job
+    # lost with its process (the default in-memory store) is queued again from them
+    async with async_session() as db:
+        user_ids = await get_pending_purge_ids(db)
+    for user_id in user_ids:
+        # Not stored: this sweep finds them again after any restart
+        await job_queue.enqueue("purge_user", durable=False, user_id=user_id)
+
+
+@job_queue.job("rehash_password")
+async def _rehash_password_job(user_id: int, old_hash: str, password: str) -> None:
+    async with async_session() as db:
+        await rehash_password(db, user_id, old_hash, password)
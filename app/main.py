@@ -1,20 +1,69 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 
+from app.core import metrics, rate_limit
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import (
+    dispose_async_engine, get_async_engine, get_pool_status, get_replica_engines, warm_up_pool, worker_pool_limits
+)
+from app.core.events import change_feed
+from app.core.jobs import job_queue
+from app.core.security import hash_pool, token_cache
+from app.core.user_cache import user_cache
+from app.api import health
 from app.api.v1.api import api_router
+from app.api.caching import page_cache
+from app.api.v1.endpoints.grocery_items import warm_up_serializers
+from app.api.pagination import NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER
+
 
+# The schema is managed by Alembic (`alembic upgrade head`); importing the app
+# doesn't touch the database.
 
-# Create database tables if they don't exist (for development/simple setups)
-# For production, prefer using Alembic migrations
-# Base.metadata.create_all(bind=engine)
-Base.metadata.create_all(bind=engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Creating the engine doesn't connect; the database is first reached by a
+    # request, or by the warm-up when enabled
+    engine = get_async_engine()
+    if settings.METRICS_ENABLED:
+        for timed_engine in (engine, *get_replica_engines()):
+            metrics.install_query_hooks(timed_engine.sync_engine)
+    if settings.STARTUP_WARMUP:
+        await warm_up_pool(worker_pool_limits()[0])
+        warm_up_serializers()
+    # Starts the job workers and requeues jobs an earlier run left in the store
+    await job_queue.start()
+    # Account deletions whose purge job was lost with an earlier process. Runs as a
+    # job, so startup still doesn't wait on (or fail with) the database
+    await job_queue.enqueue("resume_purges", durable=False)
+    yield
+    # Runs after the server has stopped accepting connections and in-flight
+    # requests have finished (or SHUTDOWN_GRACE_SECONDS ran out)
+    await change_feed.stop()
+    # Before the pools below go away, since the jobs use them
+    await job_queue.stop(settings.JOB_DRAIN_SECONDS)
+    # Let in-flight bcrypt work finish before the worker exits
+    hash_pool.shutdown()
+    await dispose_async_engine()
 
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
+    # Responses built from response models are encoded with orjson instead of the stdlib encoder
+    default_response_class=ORJSONResponse,
+)
+
+# Innermost of the middlewares, so 429s still get CORS headers and are counted in the metrics
+app.add_middleware(
+    rate_limit.RateLimitMiddleware,
+    rules=rate_limit.parse_rules(settings.RATE_LIMITS),
+    store=rate_limit.build_store(),
 )
 
 # Set all CORS enabled origins
@@ -28,13 +77,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER, "ETag", "Retry-After"],
 )
 
+if settings.METRICS_ENABLED:
+    # Outermost, so latency covers CORS handling too
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.registry.register_stats("password_hash_pool", hash_pool.stats)
+    metrics.registry.register_stats("user_cache", user_cache.stats)
+    metrics.registry.register_stats("token_cache", token_cache.stats)
+    metrics.registry.register_stats("page_cache", page_cache.stats)
+    metrics.registry.register_stats("db_pool", get_pool_status)
+    metrics.registry.register_stats("job_queue", job_queue.stats)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def read_metrics():
+        return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/", tags=["Root"])
 async def read_root():
     return {"message": f"Welcome to {settings.PROJECT_NAME}"}
 
 # Include the API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
+# Liveness/readiness probes, unversioned for load balancers and orchestrators
+app.include_router(health.router)
 
 # You might want to add global exception handlers here later
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Enum as SQLAlchemyEnum, DateTime
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, String, Enum as SQLAlchemyEnum, DateTime
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -14,8 +14,19 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped by every grocery item write; drives the list ETags
+    items_version = Column(Integer, nullable=False, server_default="0")
+    # Set by DELETE /users/me; the background purge only ever deletes users marked here
+    deletion_requested_at = Column(DateTime(timezone=True), nullable=True, index=True)
 
-    grocery_items = relationship("GroceryItem", back_populates="owner", cascade="all, delete-orphan")
+    # Items are only ever queried explicitly: touching the collection raises instead of
+    # loading a whole list, and deleting a user leaves the items to ON DELETE CASCADE
+    grocery_items = relationship(
+        "GroceryItem", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True, lazy="raise"
+    )
+
+    # Fetch server-generated created_at/updated_at with RETURNING during flush instead of a refresh SELECT
+    __mapper_args__ = {"eager_defaults": True}
 
 class GroceryStatus(str, enum.Enum):
     pending = "pending"
@@ -25,12 +36,63 @@ class GroceryItem(Base):
     __tablename__ = "grocery_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, index=True, nullable=False)
+    name = Column(String, nullable=False)
     quantity = Column(Integer, nullable=False)
     status = Column(SQLAlchemyEnum(GroceryStatus), default=GroceryStatus.pending, nullable=False)
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Owner's items_version as of the last create/update; delta sync reads changes by it
+    version = Column(Integer, nullable=False, server_default="0")
+
+    owner = relationship("User", back_populates="grocery_items", lazy="raise")
+
+    __mapper_args__ = {"eager_defaults": True}
+
+    # Every list query is owner-scoped, so every index leads with owner_id.
+    # On Postgres the migrations also add a pg_trgm GIN index on name for
+    # name_prefix / q searches; it isn't declared here since it needs the extension.
+    __table_args__ = (
+        # Owner-scoped keyset pagination
+        Index("ix_grocery_items_owner_id_id", "owner_id", "id"),
+        Index("ix_grocery_items_owner_id_status_id", "owner_id", "status", "id"),
+        Index("ix_grocery_items_owner_id_created_at", "owner_id", "created_at"),
+        Index("ix_grocery_items_owner_id_name", "owner_id", "name"),
+        # Delta sync: rows changed since a version
+        Index("ix_grocery_items_owner_id_version", "owner_id", "version"),
+    )
+
+
+class GroceryItemCounter(Base):
+    """
+    Running item count and total quantity per owner and status, kept in step with
+    grocery_items by the crud layer so the list summary is a primary-key read.
+    """
+    __tablename__ = "grocery_item_counters"
+
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    status = Column(SQLAlchemyEnum(GroceryStatus), primary_key=True)
+    item_count = Column(Integer, nullable=False, default=0)
+    total_quantity = Column(Integer, nullable=False, default=0)
+
+
+
+class GroceryItemTombstone(Base):
+    """
+    Record of a deleted grocery item, so delta sync can tell clients what to drop.
+
+    No foreign key to users; crud_users.purge_user deletes an owner's tombstones
+    along with the owner.
+    """
+    __tablename__ = "grocery_item_tombstones"
 
-    owner = relationship("User", back_populates="grocery_items")
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, nullable=False)
+    item_id = Column(Integer, nullable=False)
+    # Owner's items_version of the deleting write
+    version = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        Index("ix_grocery_item_tombstones_owner_id_version", "owner_id", "version"),
+    )
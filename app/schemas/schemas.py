@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 from app.models.models import GroceryStatus # Import Enum from models
 
@@ -26,6 +26,60 @@ class GroceryItem(GroceryItemBase):
     class Config:
         from_attributes = True # Pydantic V2 compatibility (orm_mode)
 
+GroceryItemSort = Literal["id", "-id", "name", "-name", "created_at", "-created_at"]
+
+class GroceryItemFilter(BaseModel):
+    status: Optional[GroceryStatus] = None
+    name_prefix: Optional[str] = None # case-insensitive
+    q: Optional[str] = None # case-insensitive substring of the name
+    created_after: Optional[datetime] = None # inclusive
+    created_before: Optional[datetime] = None # exclusive
+
+class GroceryItemBulkUpdate(GroceryItemUpdate):
+    id: int
+
+class GroceryItemBulkRequest(BaseModel):
+    create: List[GroceryItemCreate] = Field(default_factory=list)
+    update: List[GroceryItemBulkUpdate] = Field(default_factory=list)
+    delete: List[int] = Field(default_factory=list)
+
+class GroceryItemBulkResult(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[int] = None
+    status: int # HTTP status code for this operation
+    item: Optional[GroceryItem] = None
+    detail: Optional[str] = None
+
+class GroceryItemBulkResponse(BaseModel):
+    results: List[GroceryItemBulkResult]
+
+class GroceryStatusSummary(BaseModel):
+    count: int
+    total_quantity: int
+
+class GroceryItemSummary(BaseModel):
+    pending: GroceryStatusSummary
+    purchased: GroceryStatusSummary
+    total_count: int
+    total_quantity: int
+
+class GroceryItemChanges(BaseModel):
+    items: List[GroceryItem]  # created or updated since the token; the whole list on a full sync
+    deleted: List[int]  # ids deleted since the token
+    token: str  # pass as `since` on the next sync
+    full: bool  # True when no token was given: replace the local list with `items`
+
+class GroceryItemImportError(BaseModel):
+    line: int
+    error: str
+
+class GroceryItemImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[GroceryItemImportError]
+    errors_truncated: bool = False # True when more rows failed than are listed in errors
+    aborted: Optional[GroceryItemImportError] = None # Set when the body couldn't be read past this line
+
 
 # User Schemas
 class UserBase(BaseModel):
@@ -63,6 +117,7 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     email: Optional[EmailStr] = None
+    uid: Optional[int] = None
 
 # Generic Message Schema
 class Message(BaseModel):
@@ -0,0 +1,70 @@
+"""
+Production entry point: runs uvicorn with WEB_CONCURRENCY worker processes
+(default 1; 0 means one per available CPU).
+
+    python -m app.serve
+
+The worker count is exported to the workers, which size their connection
+pools to their share of DB_MAX_CONNECTIONS. Several workers need the shared
+Redis backends; without them a warning is logged for each per-process store.
+On SIGTERM the server stops accepting connections and gives in-flight
+requests up to SHUTDOWN_GRACE_SECONDS to finish before shutting down.
+"""
+import logging
+import os
+
+import uvicorn
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def available_cpus() -> int:
+    try:
+        # Honors CPU affinity / container cpusets where the platform exposes them
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def per_process_state() -> list[str]:
+    """
+    State that each worker process keeps to itself with the current settings,
+    and what goes wrong when there are several workers.
+    """
+    problems = []
+    if settings.USER_CACHE_TTL_SECONDS and not settings.USER_CACHE_REDIS_URL:
+        problems.append(
+            "user cache: other workers keep serving a deactivated or re-passworded user for up to "
+            "USER_CACHE_TTL_SECONDS (set USER_CACHE_REDIS_URL or USER_CACHE_TTL_SECONDS=0)"
+        )
+    if not settings.CHANGE_FEED_REDIS_URL:
+        problems.append("change feed: event stream clients only see writes made on their own worker (set CHANGE_FEED_REDIS_URL)")
+    if settings.RATE_LIMITS and not settings.RATE_LIMIT_REDIS_URL:
+        problems.append("rate limits: each worker has its own buckets, multiplying the limits (set RATE_LIMIT_REDIS_URL)")
+    if settings.ASYNC_REPLICA_URLS and settings.REPLICA_STICKY_SECONDS > 0:
+        problems.append("read replicas: read-your-writes stickiness only holds on the worker that took the write")
+    return problems
+
+
+def main() -> None:
+    workers = settings.WEB_CONCURRENCY or available_cpus()
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    if workers > 1:
+        for problem in per_process_state():
+            logger.warning("%d workers with per-process %s", workers, problem)
+    uvicorn.run(
+        "app.main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", 8000)),
+        workers=workers,
+        timeout_graceful_shutdown=settings.SHUTDOWN_GRACE_SECONDS,
+        proxy_headers=True,
+        # The client IP (and so the per-IP rate limits) comes from X-Forwarded-For only for these
+        forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+    )
+
+
+if __name__ == "__main__":
+    main()
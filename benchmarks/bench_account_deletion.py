@@ -0,0 +1,62 @@
+"""
+Account deletion latency against list size.
+
+For each --sizes count, creates a user with that many items, times
+DELETE /users/me, then times the background purge until the user and their
+items are gone. The request time should stay flat as the list grows:
+
+    python -m benchmarks.bench_account_deletion --sizes 100 1000 10000 100000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from sqlalchemy import func, select
+
+from benchmarks.common import API, make_client, owner_id_from, register_and_login, seed_items_direct
+from app.core.database import async_session
+from app.core.jobs import job_queue
+from app.models import models
+
+
+async def remaining_rows(owner_id: int) -> int:
+    async with async_session() as db:
+        items = await db.scalar(select(func.count()).where(models.GroceryItem.owner_id == owner_id))
+        users = await db.scalar(select(func.count()).where(models.User.id == owner_id))
+    return items + users
+
+
+async def run(sizes: list[int]) -> list[dict]:
+    results = []
+    async with make_client() as client:
+        for size in sizes:
+            headers = await register_and_login(client)
+            owner_id = owner_id_from(headers)
+            await seed_items_direct(owner_id, size)
+
+            start = time.perf_counter()
+            resp = await client.delete(f"{API}/users/me", headers=headers)
+            resp.raise_for_status()
+            request_s = time.perf_counter() - start
+            await job_queue.join()
+            purged_s = time.perf_counter() - start
+
+            results.append({
+                "items": size,
+                "request_ms": round(request_s * 1000, 3),
+                "purged_after_ms": round(purged_s * 1000, 3),
+                "rows_left": await remaining_rows(owner_id),
+            })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.sizes)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Auth dependency overhead: token verification cold vs cached, and GET /users/me.
+
+    python -m benchmarks.bench_auth --iterations 20000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import API, Timer, make_client, register_and_login, summarize
+from app.core import security
+
+
+def bench_decode(token: str, iterations: int, cached: bool) -> dict:
+    latencies = []
+    with Timer() as timer:
+        for _ in range(iterations):
+            if not cached:
+                security.token_cache.clear()
+            start = time.perf_counter()
+            security.decode_access_token(token)
+            latencies.append(time.perf_counter() - start)
+    return summarize("decode_token_cached" if cached else "decode_token_cold", latencies, timer.elapsed)
+
+
+async def run(iterations: int, requests: int) -> list[dict]:
+    async with make_client() as client:
+        headers = await register_and_login(client)
+        token = headers["Authorization"].split(" ", 1)[1]
+        results = [bench_decode(token, iterations, cached=False), bench_decode(token, iterations, cached=True)]
+
+        latencies = []
+        with Timer() as timer:
+            for _ in range(requests):
+                start = time.perf_counter()
+                resp = await client.get(f"{API}/users/me", headers=headers)
+                latencies.append(time.perf_counter() - start)
+                resp.raise_for_status()
+        results.append(summarize("users_me", latencies, timer.elapsed))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    for row in asyncio.run(run(args.iterations, args.requests)):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
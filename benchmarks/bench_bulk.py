@@ -0,0 +1,58 @@
+"""
+Bulk vs one-at-a-time item sync.
+
+Creates, updates and deletes --items items, once through the single-item
+endpoints and once through POST /groceries/bulk, and reports wall time for each.
+
+    python -m benchmarks.bench_bulk --items 1000
+"""
+import argparse
+import asyncio
+import json
+
+from benchmarks.common import API, Timer, make_client, register_and_login
+
+
+async def run(items: int) -> list[dict]:
+    async with make_client() as client:
+        headers = await register_and_login(client)
+        with Timer() as single:
+            ids = []
+            for i in range(items):
+                resp = await client.post(f"{API}/groceries/", json={"name": f"single-{i}", "quantity": 1}, headers=headers)
+                ids.append(resp.json()["id"])
+            for item_id in ids:
+                await client.put(f"{API}/groceries/{item_id}", json={"status": "purchased"}, headers=headers)
+            for item_id in ids:
+                await client.delete(f"{API}/groceries/{item_id}", headers=headers)
+
+        with Timer() as bulk:
+            resp = await client.post(
+                f"{API}/groceries/bulk",
+                json={"create": [{"name": f"bulk-{i}", "quantity": 1} for i in range(items)]},
+                headers=headers,
+            )
+            ids = [result["id"] for result in resp.json()["results"]]
+            await client.post(
+                f"{API}/groceries/bulk",
+                json={"update": [{"id": item_id, "status": "purchased"} for item_id in ids]},
+                headers=headers,
+            )
+            await client.post(f"{API}/groceries/bulk", json={"delete": ids}, headers=headers)
+
+    return [
+        {"name": "sync_single_endpoints", "items": items, "elapsed_s": round(single.elapsed, 4)},
+        {"name": "sync_bulk_endpoint", "items": items, "elapsed_s": round(bulk.elapsed, 4)},
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=1000)
+    args = parser.parse_args()
+    for row in asyncio.run(run(args.items)):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
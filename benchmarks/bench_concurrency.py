@@ -0,0 +1,47 @@
+"""
+Concurrent-request throughput for GET /groceries/.
+
+Fires --requests list reads with --concurrency in flight at once and reports
+throughput and latency percentiles. Run it on two commits to compare a change:
+
+    python -m benchmarks.bench_concurrency --concurrency 50 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import API, Timer, make_client, register_and_login, seed_items, summarize
+
+
+async def run(concurrency: int, requests: int, items: int) -> dict:
+    async with make_client() as client:
+        headers = await register_and_login(client)
+        await seed_items(client, headers, items)
+
+        latencies: list[float] = []
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one() -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                resp = await client.get(f"{API}/groceries/", headers=headers)
+                latencies.append(time.perf_counter() - start)
+                resp.raise_for_status()
+
+        with Timer() as timer:
+            await asyncio.gather(*(one() for _ in range(requests)))
+        return summarize(f"list_groceries_c{concurrency}", latencies, timer.elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.concurrency, args.requests, args.items))))
+
+
+if __name__ == "__main__":
+    main()
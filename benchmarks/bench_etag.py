@@ -0,0 +1,46 @@
+"""
+Polling cost of GET /groceries/: full responses vs If-None-Match revalidation.
+
+    python -m benchmarks.bench_etag --items 500 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import API, Timer, make_client, register_and_login, seed_items, summarize
+
+
+async def poll(client, headers: dict, requests: int, name: str) -> dict:
+    latencies = []
+    with Timer() as timer:
+        for _ in range(requests):
+            start = time.perf_counter()
+            resp = await client.get(f"{API}/groceries/", params={"limit": 1000}, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            assert resp.status_code in (200, 304), resp.status_code
+    return summarize(name, latencies, timer.elapsed)
+
+
+async def run(items: int, requests: int) -> list[dict]:
+    async with make_client() as client:
+        headers = await register_and_login(client)
+        await seed_items(client, headers, items)
+        first = await client.get(f"{API}/groceries/", params={"limit": 1000}, headers=headers)
+        return [
+            await poll(client, headers, requests, "poll_full_or_page_cache"),
+            await poll(client, {**headers, "If-None-Match": first.headers["ETag"]}, requests, "poll_if_none_match_304"),
+        ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    for row in asyncio.run(run(args.items, args.requests)):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Streaming export memory: seed --rows items for one user, stream them as NDJSON
+or CSV and check that peak RSS grows by less than --rss-ceiling-mb.
+
+The export runs in a fresh process: peak RSS never goes down, so measured in the
+seeding process the export's growth would hide under the seeding peak. Drives the
+export generator directly, since httpx's ASGI transport buffers whole response
+bodies. Exits non-zero if the ceiling is exceeded.
+
+    python -m benchmarks.bench_export --rows 1000000 --rss-ceiling-mb 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+
+from benchmarks.common import Timer, make_client, owner_id_from, register_and_login, seed_items_direct
+from app.api.v1.endpoints.grocery_items import _export_rows
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def seed(rows: int) -> int:
+    async with make_client() as client:
+        headers = await register_and_login(client)
+    owner_id = owner_id_from(headers)
+    await seed_items_direct(owner_id, rows)
+    return owner_id
+
+
+async def export(owner_id: int, export_format: str) -> dict:
+    baseline = peak_rss_mb()
+    exported_bytes = 0
+    with Timer() as timer:
+        async for chunk in _export_rows(owner_id, export_format):
+            exported_bytes += len(chunk)
+    return {
+        "name": f"export_{export_format}",
+        "bytes": exported_bytes,
+        "elapsed_s": round(timer.elapsed, 4),
+        "rss_baseline_mb": round(baseline, 1),
+        "rss_growth_mb": round(peak_rss_mb() - baseline, 1),
+    }
+
+
+def run(rows: int, export_format: str) -> dict:
+    owner_id = asyncio.run(seed(rows))
+    # Same database: benchmarks.common put DATABASE_URL in the environment
+    child = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_export", "--export-owner", str(owner_id), "--format", export_format],
+        env=os.environ, capture_output=True, text=True, check=True,
+    )
+    return {**json.loads(child.stdout.splitlines()[-1]), "rows": rows}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--rss-ceiling-mb", type=float, default=64)
+    # Internal: the fresh process that only runs the export of an already seeded user
+    parser.add_argument("--export-owner", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.export_owner is not None:
+        print(json.dumps(asyncio.run(export(args.export_owner, args.format))))
+        return
+    result = run(args.rows, args.format)
+    print(json.dumps(result))
+    if result["rss_growth_mb"] > args.rss_ceiling_mb:
+        sys.exit(f"RSS grew by {result['rss_growth_mb']} MB, above the {args.rss_ceiling_mb} MB ceiling")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Filtered, sorted and searched list reads over a large per-owner history.
+
+Seeds --items items for one owner (100k by default) and times each query shape.
+The in-process page cache is disabled so every request reaches the database.
+
+    python -m benchmarks.bench_filters --items 100000 --requests 200
+"""
+import os
+
+os.environ.setdefault("LIST_PAGE_CACHE_MAX_ENTRIES", "0")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import time  # noqa: E402
+from datetime import datetime, timedelta, timezone  # noqa: E402
+
+from benchmarks.common import (  # noqa: E402
+    API, Timer, make_client, owner_id_from, register_and_login, seed_items_direct, summarize,
+)
+from app.models import models  # noqa: E402
+
+WORDS = ["apple", "banana", "bread", "butter", "carrot", "cheese", "coffee", "eggs", "milk", "rice", "salmon", "tea"]
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def make_row(i: int) -> dict:
+    return {
+        "name": f"{WORDS[i % len(WORDS)]} {i}",
+        "quantity": 1 + i % 5,
+        "status": models.GroceryStatus.purchased if i % 4 else models.GroceryStatus.pending,
+        "created_at": EPOCH + timedelta(minutes=i),
+    }
+
+
+QUERIES = {
+    "status_pending": {"status": "pending"},
+    "name_prefix": {"name_prefix": "salm"},
+    "name_substring": {"q": "ees"},
+    "created_range": {"created_after": (EPOCH + timedelta(days=30)).isoformat(), "created_before": (EPOCH + timedelta(days=31)).isoformat()},
+    "sort_created_desc": {"sort": "-created_at"},
+    "sort_name": {"sort": "name"},
+    "deep_offset": {"skip": 90000},
+}
+
+
+async def run(items: int, requests: int) -> list[dict]:
+    async with make_client() as client:
+        headers = await register_and_login(client)
+        await seed_items_direct(owner_id_from(headers), items, make_row=make_row)
+
+        results = []
+        for name, params in QUERIES.items():
+            latencies = []
+            with Timer() as timer:
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    resp = await client.get(f"{API}/groceries/", params={"limit": 100, **params}, headers=headers)
+                    latencies.append(time.perf_counter() - start)
+                    resp.raise_for_status()
+            results.append({**summarize(name, latencies, timer.elapsed), "items": items})
+        return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    for row in asyncio.run(run(args.items, args.requests)):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Login storm: latency of unrelated GET /groceries/ reads while logins hammer bcrypt.
+
+A reader loop measures list-read latency first on a quiet app, then while
+--logins concurrent logins run. With bcrypt off the event loop, the read p99
+during the storm should stay close to the quiet baseline.
+
+    python -m benchmarks.bench_login_storm --logins 200 --login-concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import API, PASSWORD, Timer, make_client, register_and_login, seed_items, summarize
+from app.core.security import hash_pool
+
+
+async def read_loop(client, headers, stop: asyncio.Event, latencies: list[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        resp = await client.get(f"{API}/groceries/", headers=headers)
+        latencies.append(time.perf_counter() - start)
+        resp.raise_for_status()
+
+
+async def run(logins: int, login_concurrency: int, quiet_seconds: float) -> list[dict]:
+    async with make_client() as client:
+        reader_headers = await register_and_login(client)
+        await seed_items(client, reader_headers, 20)
+        email = f"storm-{int(time.time() * 1000)}@example.com"
+        (await client.post(f"{API}/auth/register", json={"email": email, "password": PASSWORD})).raise_for_status()
+
+        quiet: list[float] = []
+        stop = asyncio.Event()
+        with Timer() as quiet_timer:
+            reader = asyncio.create_task(read_loop(client, reader_headers, stop, quiet))
+            await asyncio.sleep(quiet_seconds)
+            stop.set()
+            await reader
+
+        storm: list[float] = []
+        stop = asyncio.Event()
+        semaphore = asyncio.Semaphore(login_concurrency)
+
+        async def login() -> None:
+            async with semaphore:
+                resp = await client.post(f"{API}/auth/login", data={"username": email, "password": PASSWORD})
+                resp.raise_for_status()
+
+        with Timer() as storm_timer:
+            reader = asyncio.create_task(read_loop(client, reader_headers, stop, storm))
+            await asyncio.gather(*(login() for _ in range(logins)))
+            stop.set()
+            await reader
+
+        results = [
+            summarize("reads_quiet", quiet, quiet_timer.elapsed),
+            summarize("reads_during_login_storm", storm, storm_timer.elapsed),
+        ]
+        results[1]["hash_pool"] = hash_pool.stats()
+        return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--login-concurrency", type=int, default=50)
+    parser.add_argument("--quiet-seconds", type=float, default=3.0)
+    args = parser.parse_args()
+    for row in asyncio.run(run(args.logins, args.login_concurrency, args.quiet_seconds)):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
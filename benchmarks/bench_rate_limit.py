@@ -0,0 +1,80 @@
+"""
+Overhead of the rate-limit middleware, with the in-memory store.
+
+Calls the middleware directly around a no-op ASGI app (no HTTP stack, no
+database) and reports the per-request cost of each path next to the bare
+no-op app, in microseconds:
+
+    python -m benchmarks.bench_rate_limit --iterations 100000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.core import security
+from app.core.rate_limit import InMemoryBucketStore, RateLimitMiddleware, parse_rules
+
+RULES = "POST /api/v1/auth/login=1000000000/1:ip,* /api/v1/groceries/{item_id}=1000000000/1:user"
+
+
+async def noop_app(scope, receive, send):
+    pass
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+def make_scope(method: str, path: str, headers: list, client: str = "10.0.0.1") -> dict:
+    return {"type": "http", "method": method, "path": path, "headers": headers, "client": (client, 1234)}
+
+
+async def time_calls(app, scopes: list, iterations: int) -> float:
+    """Mean microseconds per call."""
+    start = time.perf_counter()
+    for i in range(iterations):
+        await app(scopes[i % len(scopes)], receive, send)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def run(iterations: int, clients: int) -> list[dict]:
+    token = security.create_access_token("bench@example.com", uid=1)
+    auth = [(b"authorization", f"Bearer {token}".encode())]
+    limiter = RateLimitMiddleware(noop_app, parse_rules(RULES), InMemoryBucketStore())
+    # Tiny bucket so every call after the first is rejected
+    denying = RateLimitMiddleware(noop_app, parse_rules("* /deny=1/3600:ip"), InMemoryBucketStore())
+
+    cases = {
+        "baseline_noop_app": (noop_app, [make_scope("GET", "/api/v1/groceries/", [])]),
+        "unmatched_route": (limiter, [make_scope("GET", "/api/v1/users/me", [])]),
+        "ip_allowed": (limiter, [
+            make_scope("POST", "/api/v1/auth/login", [], client=f"10.0.{i // 256}.{i % 256}") for i in range(clients)
+        ]),
+        "user_allowed": (limiter, [make_scope("PUT", "/api/v1/groceries/7", auth)]),
+        "ip_rejected": (denying, [make_scope("GET", "/deny", [])]),
+    }
+    results = []
+    for name, (app, scopes) in cases.items():
+        await time_calls(app, scopes, min(iterations, 1000))  # warm caches and buckets
+        results.append({"name": name, "iterations": iterations, "mean_us": round(await time_calls(app, scopes, iterations), 3)})
+    baseline = results[0]["mean_us"]
+    for result in results[1:]:
+        result["overhead_us"] = round(result["mean_us"] - baseline, 3)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--clients", type=int, default=10000, help="distinct IPs cycled through by ip_allowed")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.iterations, args.clients)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
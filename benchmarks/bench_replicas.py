@@ -0,0 +1,110 @@
+"""
+Read-replica routing against a primary and two SQLite replica stand-ins.
+
+The replicas are copies of the primary taken after seeding, standing in for
+replicas that have caught up; later writes only reach the primary, so a read
+served by a replica visibly misses them. Reports how list reads were spread
+over the databases and their latency, and checks read-your-writes:
+
+- right after a write, the writer's reads go to the primary and see it
+- once REPLICA_STICKY_SECONDS has passed they go back to the (stale) replicas
+- a user registered after the replicas were copied can read right away
+
+Exits non-zero if any of these checks fails.
+
+    python -m benchmarks.bench_replicas --requests 500
+"""
+import os
+import shutil
+import tempfile
+
+_dir = tempfile.mkdtemp(prefix="grocerywise-bench-")
+_primary = os.path.join(_dir, "primary.db")
+_replicas = [os.path.join(_dir, f"replica{i}.db") for i in (1, 2)]
+os.environ["DATABASE_URL"] = f"sqlite:///{_primary}"
+os.environ["DATABASE_REPLICA_URLS"] = ",".join(f"sqlite:///{path}" for path in _replicas)
+os.environ.setdefault("REPLICA_STICKY_SECONDS", "1")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+from collections import Counter  # noqa: E402
+
+from sqlalchemy import event  # noqa: E402
+
+from benchmarks.common import API, Timer, make_client, register_and_login, seed_items, summarize  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.database import get_async_engine, get_replica_engines  # noqa: E402
+
+
+def count_statements(counts: Counter) -> None:
+    engines = {"primary": get_async_engine(), **{f"replica{i}": e for i, e in enumerate(get_replica_engines(), 1)}}
+    for name, engine in engines.items():
+        event.listen(
+            engine.sync_engine, "before_cursor_execute", lambda *args, name=name: counts.update([name])
+        )
+
+
+async def list_names(client, headers) -> set[str]:
+    resp = await client.get(f"{API}/groceries/", params={"limit": 1000}, headers=headers)
+    resp.raise_for_status()
+    return {item["name"] for item in resp.json()}
+
+
+async def run(requests: int, items: int) -> dict:
+    counts: Counter = Counter()
+    async with make_client() as client:
+        headers = await register_and_login(client)
+        await seed_items(client, headers, items)
+        # "Replication": the replicas catch up with everything written so far
+        for path in _replicas:
+            shutil.copyfile(_primary, path)
+        count_statements(counts)
+        await asyncio.sleep(settings.REPLICA_STICKY_SECONDS)
+
+        latencies = []
+        with Timer() as timer:
+            for _ in range(requests):
+                start = time.perf_counter()
+                await list_names(client, headers)
+                latencies.append(time.perf_counter() - start)
+        reads = summarize("list_groceries_replicas", latencies, timer.elapsed)
+        read_counts = dict(counts)
+
+        resp = await client.post(f"{API}/groceries/", json={"name": "fresh-write", "quantity": 1}, headers=headers)
+        resp.raise_for_status()
+        read_your_writes = "fresh-write" in await list_names(client, headers)
+        await asyncio.sleep(settings.REPLICA_STICKY_SECONDS)
+        back_on_replicas = "fresh-write" not in await list_names(client, headers)
+
+        # The replicas have never seen this user
+        new_headers = await register_and_login(client)
+        new_user_reads = (await client.get(f"{API}/users/me", headers=new_headers)).status_code == 200
+
+    return {
+        "reads": reads,
+        "statements_by_database": read_counts,
+        "checks": {
+            "read_your_writes": read_your_writes,
+            "back_on_replicas_after_window": back_on_replicas,
+            "new_user_reads_after_register": new_user_reads,
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--items", type=int, default=50)
+    args = parser.parse_args()
+    result = asyncio.run(run(args.requests, args.items))
+    print(json.dumps(result, indent=2))
+    failed = [name for name, passed in result["checks"].items() if not passed]
+    if failed:
+        sys.exit(f"Failed: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
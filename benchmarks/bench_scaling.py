@@ -0,0 +1,127 @@
+"""
+Throughput scaling across worker processes.
+
+For each --workers count, starts `python -m app.serve` on a local port, seeds a
+user, and drives GET /groceries/ over real HTTP from --clients load-generator
+processes (so the client isn't the bottleneck) for --duration seconds. Reports
+throughput and latency per worker count and the scaling efficiency against one
+worker (1.0 = perfectly linear):
+
+    python -m benchmarks.bench_scaling --workers 1 2 4 --clients 4 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import API, PASSWORD, summarize
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers), "PORT": str(port), "HOST": "127.0.0.1"}
+    return subprocess.Popen([sys.executable, "-m", "app.serve"], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(f"{base_url}/readyz").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+def seed(base_url: str, items: int) -> dict:
+    email = f"scaling-{os.getpid()}-{time.time_ns()}@example.com"
+    with httpx.Client(base_url=base_url) as client:
+        client.post(f"{API}/auth/register", json={"email": email, "password": PASSWORD}).raise_for_status()
+        resp = client.post(f"{API}/auth/login", data={"username": email, "password": PASSWORD})
+        resp.raise_for_status()
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        client.post(
+            f"{API}/groceries/bulk",
+            json={"create": [{"name": f"item-{i}", "quantity": 1} for i in range(items)]},
+            headers=headers,
+        ).raise_for_status()
+    return headers
+
+
+async def drive(base_url: str, headers: dict, concurrency: int, duration: float) -> list[float]:
+    latencies: list[float] = []
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits) as client:
+
+        async def worker() -> None:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                resp = await client.get(f"{API}/groceries/")
+                resp.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def client_process(args: tuple) -> list[float]:
+    return asyncio.run(drive(*args))
+
+
+def run(workers: int, clients: int, concurrency: int, duration: float, items: int) -> dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(workers, port)
+    try:
+        wait_ready(base_url)
+        headers = seed(base_url, items)
+        per_client = max(concurrency // clients, 1)
+        with multiprocessing.Pool(clients) as pool:
+            start = time.perf_counter()
+            results = pool.map(client_process, [(base_url, headers, per_client, duration)] * clients)
+            elapsed = time.perf_counter() - start
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+    result = summarize(f"list_groceries_w{workers}", [value for values in results for value in values], elapsed)
+    result["workers"] = workers
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=4, help="load-generator processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight across all clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per worker count")
+    parser.add_argument("--items", type=int, default=50)
+    args = parser.parse_args()
+
+    results = [run(workers, args.clients, args.concurrency, args.duration, args.items) for workers in args.workers]
+    baseline = next((r for r in results if r["workers"] == 1), None)
+    for result in results:
+        if baseline and baseline["throughput_rps"]:
+            result["scaling_efficiency"] = round(
+                result["throughput_rps"] / (baseline["throughput_rps"] * result["workers"]), 3
+            )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Serialization cost of a grocery list page.
+
+Loads --items rows for one user once, then encodes the page --iterations times
+per path and reports the mean time and the peak allocations (tracemalloc) of
+one encode, plus the body size:
+
+    python -m benchmarks.bench_serialization --items 1000 --iterations 200
+
+Paths:
+- orm_jsonable_stdlib: ORM objects, jsonable_encoder, stdlib json (FastAPI's default response path)
+- orm_adapter_dump_json: ORM objects validated with from_attributes, pydantic-core dump_json (the list route before)
+- rows_orjson: Core rows of the schema's columns encoded with orjson (the list route now)
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from benchmarks.common import make_client, owner_id_from, register_and_login, seed_items_direct
+from app.api.serialization import dump_rows
+from app.core.database import async_session
+from app.crud.grocery_items import ITEM_COLUMNS
+from app.models import models
+from app.schemas import schemas
+
+_adapter = TypeAdapter(List[schemas.GroceryItem])
+
+
+def orm_jsonable_stdlib(objects, rows) -> bytes:
+    validated = _adapter.validate_python(objects, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def orm_adapter_dump_json(objects, rows) -> bytes:
+    return _adapter.dump_json(_adapter.validate_python(objects, from_attributes=True))
+
+
+def rows_orjson(objects, rows) -> bytes:
+    return dump_rows(rows)
+
+
+PATHS = [orm_jsonable_stdlib, orm_adapter_dump_json, rows_orjson]
+
+
+async def load(items: int):
+    async with make_client() as client:
+        owner_id = owner_id_from(await register_and_login(client))
+    await seed_items_direct(owner_id, items)
+    async with async_session() as db:
+        where = models.GroceryItem.owner_id == owner_id
+        objects = list((await db.execute(select(models.GroceryItem).where(where).order_by(models.GroceryItem.id))).scalars())
+        rows = list((await db.execute(select(*ITEM_COLUMNS).where(where).order_by(models.GroceryItem.id))).all())
+    return objects, rows
+
+
+def measure(path, objects, rows, iterations: int) -> dict:
+    body = path(objects, rows)  # warm-up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        path(objects, rows)
+    mean = (time.perf_counter() - start) / iterations
+    tracemalloc.start()
+    path(objects, rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "name": path.__name__,
+        "mean_ms": round(mean * 1000, 3),
+        "peak_alloc_kb": round(peak / 1024, 1),
+        "body_bytes": len(body),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    objects, rows = asyncio.run(load(args.items))
+    # The paths must agree on the payload for the comparison to mean anything
+    expected = json.loads(orm_adapter_dump_json(objects, rows))
+    for path in PATHS:
+        assert json.loads(path(objects, rows)) == expected, f"{path.__name__} output differs"
+    results = [measure(path, objects, rows, args.iterations) for path in PATHS]
+    baseline = results[0]["mean_ms"]
+    for result in results:
+        result["speedup"] = round(baseline / result["mean_ms"], 2) if result["mean_ms"] else None
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Deleting a user with a large grocery list.
+
+Creates a user with --items items and deletes them with crud_users.purge_user
+(one DELETE that the database cascades to the items). With
+--compare-orm, a second user of the same size is deleted the way an ORM
+cascade without passive_deletes does it: every item loaded, then deleted by
+primary key. Reports wall time and statements sent per path:
+
+    python -m benchmarks.bench_user_purge --items 100000 --compare-orm
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from sqlalchemy import delete, event, func, select, update
+
+from benchmarks.common import make_client, owner_id_from, register_and_login, seed_items_direct
+from app.core.database import async_session, get_async_engine
+from app.crud import grocery_items as crud_items
+from app.crud import users as crud_users
+from app.models import models
+
+
+async def make_user(items: int) -> int:
+    async with make_client() as client:
+        owner_id = owner_id_from(await register_and_login(client))
+    await seed_items_direct(owner_id, items)
+    async with async_session() as db:
+        await db.execute(update(models.User).where(models.User.id == owner_id).values(is_active=False, deletion_requested_at=func.now()))
+        await db.commit()
+    return owner_id
+
+
+async def purge(db, owner_id: int) -> None:
+    assert await crud_users.purge_user(db, owner_id)
+
+
+async def orm_cascade(db, owner_id: int) -> None:
+    await crud_items.delete_tombstones(db, owner_id)
+    items = (await db.execute(select(models.GroceryItem).where(models.GroceryItem.owner_id == owner_id))).scalars().all()
+    for item in items:
+        await db.delete(item)
+    await db.flush()
+    await db.execute(delete(models.User).where(models.User.id == owner_id))
+    await db.commit()
+
+
+async def measure(name: str, delete_user, items: int) -> dict:
+    owner_id = await make_user(items)
+    statements = 0
+
+    def count(*args) -> None:
+        nonlocal statements
+        statements += 1
+
+    sync_engine = get_async_engine().sync_engine
+    event.listen(sync_engine, "before_cursor_execute", count)
+    try:
+        async with async_session() as db:
+            start = time.perf_counter()
+            await delete_user(db, owner_id)
+            elapsed = time.perf_counter() - start
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", count)
+
+    async with async_session() as db:
+        left = await db.scalar(select(func.count()).where(models.GroceryItem.owner_id == owner_id))
+    return {"name": name, "items": items, "elapsed_s": round(elapsed, 4), "statements": statements, "items_left": left}
+
+
+async def run(items: int, compare_orm: bool) -> list[dict]:
+    results = [await measure("purge_user_db_cascade", purge, items)]
+    if compare_orm:
+        results.append(await measure("orm_load_and_delete", orm_cascade, items))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--compare-orm", action="store_true", help="also time the load-every-item deletion")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.items, args.compare_orm)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Write-path latency: sequential POST /groceries/ and PUT /groceries/{id}.
+
+    python -m benchmarks.bench_writes --items 1000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import API, Timer, make_client, register_and_login, summarize
+
+
+async def run(items: int) -> list[dict]:
+    async with make_client() as client:
+        headers = await register_and_login(client)
+
+        create_latencies: list[float] = []
+        ids = []
+        with Timer() as create_timer:
+            for i in range(items):
+                start = time.perf_counter()
+                resp = await client.post(f"{API}/groceries/", json={"name": f"item-{i}", "quantity": 1}, headers=headers)
+                create_latencies.append(time.perf_counter() - start)
+                ids.append(resp.json()["id"])
+
+        update_latencies: list[float] = []
+        with Timer() as update_timer:
+            for item_id in ids:
+                start = time.perf_counter()
+                resp = await client.put(f"{API}/groceries/{item_id}", json={"quantity": 2}, headers=headers)
+                update_latencies.append(time.perf_counter() - start)
+                resp.raise_for_status()
+
+    return [
+        summarize("create_item", create_latencies, create_timer.elapsed),
+        summarize("update_item", update_latencies, update_timer.elapsed),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=1000)
+    args = parser.parse_args()
+    for row in asyncio.run(run(args.items)):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
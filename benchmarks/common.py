@@ -0,0 +1,118 @@
+"""
+Shared helpers for the benchmark scripts.
+
+The app is driven in-process through httpx's ASGI transport so no server needs
+to be running. Unless DATABASE_URL is already set, a throwaway SQLite file is used.
+"""
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+if not os.getenv("DATABASE_URL"):
+    _db_path = os.path.join(tempfile.mkdtemp(prefix="grocerywise-bench-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+# Benchmarks hammer single routes from one client; only limit when asked to
+os.environ.setdefault("RATE_LIMITS", "")
+
+import httpx  # noqa: E402
+from sqlalchemy import create_engine, insert  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.database import Base, async_session  # noqa: E402
+from app.core.security import decode_access_token  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import models  # noqa: E402
+
+API = settings.API_V1_STR
+
+
+def create_schema() -> None:
+    """
+    The app leaves the schema to Alembic; benchmarks build it straight from the models.
+    """
+    engine = create_engine(settings.DATABASE_URL)
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+
+create_schema()
+PASSWORD = "benchmark-password"
+
+
+def make_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+async def register(client: httpx.AsyncClient) -> str:
+    """Create a fresh user with PASSWORD and return its email."""
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    resp = await client.post(f"{API}/auth/register", json={"email": email, "password": PASSWORD})
+    resp.raise_for_status()
+    return email
+
+
+async def login(client: httpx.AsyncClient, email: str) -> dict:
+    """Log in and return the Authorization header."""
+    resp = await client.post(f"{API}/auth/login", data={"username": email, "password": PASSWORD})
+    resp.raise_for_status()
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+async def register_and_login(client: httpx.AsyncClient) -> dict:
+    """Create a fresh user and return the Authorization header for it."""
+    return await login(client, await register(client))
+
+
+async def seed_items(client: httpx.AsyncClient, headers: dict, count: int) -> None:
+    for i in range(count):
+        resp = await client.post(f"{API}/groceries/", json={"name": f"item-{i}", "quantity": 1}, headers=headers)
+        resp.raise_for_status()
+
+
+def owner_id_from(headers: dict) -> int:
+    return decode_access_token(headers["Authorization"].split(" ", 1)[1]).uid
+
+
+async def seed_items_direct(owner_id: int, count: int, batch: int = 10000, make_row=None) -> None:
+    """
+    Insert `count` items straight into the database, for scales where going through
+    the API would dominate the run. `make_row(i)` can override the row contents.
+    """
+    make_row = make_row or (lambda i: {"name": f"item-{i}", "quantity": 1, "status": models.GroceryStatus.pending})
+    async with async_session() as db:
+        for start in range(0, count, batch):
+            await db.execute(
+                insert(models.GroceryItem.__table__),
+                [{**make_row(i), "owner_id": owner_id} for i in range(start, min(start + batch, count))],
+            )
+            await db.commit()
+
+
+def summarize(name: str, latencies: list[float], elapsed: float) -> dict:
+    """Build a result row from per-request latencies (seconds) and wall time."""
+    ordered = sorted(latencies)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        "name": name,
+        "requests": len(ordered),
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(pct(50), 3),
+        "p95_ms": round(pct(95), 3),
+        "p99_ms": round(pct(99), 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
@@ -0,0 +1,58 @@
+"""
+Compare two benchmark result files (JSON from bench_mixed --output).
+
+Prints the change in throughput and p50/p95/p99 per operation, and exits with
+status 1 if any operation's p95 got slower by more than --threshold percent:
+
+    python -m benchmarks.compare results/base.json results/head.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+METRICS = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        result = json.load(f)
+    rows = {row["name"]: row for row in result.get("operations", [])}
+    rows["overall"] = result["overall"]
+    return {"commit": result.get("commit"), "database": result.get("database"), "rows": rows}
+
+
+def change(before: float, after: float) -> float | None:
+    return (after - before) / before * 100 if before else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed p95 slowdown in percent")
+    args = parser.parse_args()
+
+    base, head = load(args.base), load(args.head)
+    if base["database"] != head["database"]:
+        print(f"warning: comparing {base['database']} against {head['database']}", file=sys.stderr)
+
+    report = {"base": base["commit"], "head": head["commit"], "operations": {}, "regressions": []}
+    for name, head_row in head["rows"].items():
+        base_row = base["rows"].get(name)
+        if base_row is None:
+            continue
+        deltas = {}
+        for metric in METRICS:
+            pct = change(base_row[metric], head_row[metric])
+            deltas[metric] = {"base": base_row[metric], "head": head_row[metric], "change_pct": None if pct is None else round(pct, 1)}
+        report["operations"][name] = deltas
+        p95_change = deltas["p95_ms"]["change_pct"]
+        if p95_change is not None and p95_change > args.threshold:
+            report["regressions"].append(name)
+
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report["regressions"] else 0)
+
+
+if __name__ == "__main__":
+    main()